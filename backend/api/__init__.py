@@ -6,6 +6,8 @@ __all__ = [
     "CurseforgeAPI",
     "FTBAPI",
     "ModrinthAPI",
+    "RateLimitError",
+    "IncompleteResultError",
     "SourceAPI",
     "get_minecraft_versions",
     "get_fabric_versions",
@@ -18,7 +20,7 @@ if TYPE_CHECKING:
     from .sourceapi import SourceAPI
     from .curseforge import CurseforgeAPI
     from .ftb import FTBAPI
-    from .modrinth import ModrinthAPI
+    from .modrinth import ModrinthAPI, RateLimitError, IncompleteResultError
     from .sourceapi import SourceAPI
     from .mojang import get_minecraft_versions
     from .fabric import get_fabric_versions
@@ -32,6 +34,8 @@ _lazy_map = {
     "CurseforgeAPI": ".curseforge",
     "FTBAPI": ".ftb",
     "ModrinthAPI": ".modrinth",
+    "RateLimitError": ".modrinth",
+    "IncompleteResultError": ".modrinth",
     "SourceAPI": ".sourceapi",
     "get_minecraft_versions": ".mojang",
     "get_fabric_versions": ".fabric",
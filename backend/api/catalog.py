@@ -0,0 +1,117 @@
+import asyncio, httpx, json, os, time
+from pathlib import Path
+from typing import Callable
+
+from helpers import get_http_client
+from config import CATALOG_DIR, CATALOG_MAX_AGE
+
+CatalogIndex = dict[str, list[dict]] # Minecraft version -> versions
+
+class VersionCatalog:
+    """
+    A modloader version feed stored on disk, with its versions indexed by Minecraft version.
+
+    The feed is saved as `<root>/<name>.feed` and parsed once by `parse(path)` into an index saved
+    as `<name>.index.json`, together with the ETag and Last-Modified of the feed.
+    A feed older than `max_age` seconds is revalidated with a conditional request in the background
+    while the stored index is used, so it's only downloaded and parsed again when it changed.
+    Without a connection the stored index is used however old it is.
+    """
+    def __init__(self, name: str, url: str, parse: Callable[[Path], CatalogIndex], root: Path = Path(CATALOG_DIR), max_age: float = CATALOG_MAX_AGE):
+        self.name = name
+        self.url = url
+        self.parse = parse
+        self.max_age = max_age
+        self.feed = root / f"{name}.feed"
+        self.index_file = root / f"{name}.index.json"
+        self._index: CatalogIndex | None = None
+        self._meta: dict = {}
+        self._refreshing: asyncio.Task | None = None
+
+    async def get(self, mc_version: str) -> list[dict]:
+        """
+        Get the versions for a Minecraft version, empty if there are none.
+
+        Raises:
+            httpx.HTTPError | OSError | ValueError: If there is no stored index and the feed can't be loaded.
+        """
+        if self._index is None:
+            await asyncio.to_thread(self._load)
+        if self._index is None:
+            # nothing to fall back to, failing reads differently than a Minecraft version without versions
+            await self.refresh(raise_errors=True)
+        elif self.is_stale() and (self._refreshing is None or self._refreshing.done()):
+            self._refreshing = asyncio.create_task(self.refresh())
+        return (self._index or {}).get(mc_version, [])
+
+    def is_stale(self) -> bool:
+        return time.time() - self._meta.get("checked", 0) >= self.max_age
+
+    def _load(self):
+        """Load the stored index, parsing the stored feed again if only the index is missing."""
+        try:
+            data = json.loads(self.index_file.read_text(encoding='utf-8'))
+            self._index, self._meta = data["index"], data["meta"]
+            return
+        except (OSError, ValueError, KeyError):
+            pass
+        if self.feed.exists():
+            try:
+                # the feed is revalidated right away, its age is unknown
+                self._save(self.parse(self.feed), {"url": self.url})
+            except (OSError, ValueError, KeyError, TypeError, SyntaxError):
+                self.feed.unlink(missing_ok=True)
+
+    def _save(self, index: CatalogIndex, meta: dict):
+        self._index, self._meta = index, meta
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.index_file.with_name(self.index_file.name + '.tmp')
+        temp.write_text(json.dumps({"meta": meta, "index": index}), encoding='utf-8')
+        os.replace(temp, self.index_file)
+
+    async def refresh(self, raise_errors: bool = False) -> bool:
+        """
+        Revalidate the feed, downloading and indexing it again if it changed.
+
+        Returns:
+            bool: If the feed could be checked, `False` if it's offline or the feed is broken and `raise_errors` is not set.
+        """
+        headers = {}
+        if self.feed.exists() and self._meta.get("url") == self.url:
+            if self._meta.get("etag"):
+                headers["If-None-Match"] = self._meta["etag"]
+            if self._meta.get("last_modified"):
+                headers["If-Modified-Since"] = self._meta["last_modified"]
+
+        temp = self.feed.with_name(self.feed.name + '.tmp')
+        meta = {**self._meta, "url": self.url, "checked": time.time()}
+        try:
+            async with get_http_client().stream("GET", self.url, headers=headers) as resp:
+                if resp.status_code == 304 and self._index is not None:
+                    await asyncio.to_thread(self._save, self._index, meta)
+                    return True
+                resp.raise_for_status()
+                temp.parent.mkdir(parents=True, exist_ok=True)
+                with open(temp, 'wb') as f:
+                    async for chunk in resp.aiter_bytes():
+                        f.write(chunk)
+                meta["etag"] = resp.headers.get("ETag")
+                meta["last_modified"] = resp.headers.get("Last-Modified")
+            # feeds are up to several MB, parsed off the event loop
+            index = await asyncio.to_thread(self.parse, temp)
+        except (httpx.HTTPError, OSError, ValueError, KeyError, TypeError, SyntaxError):
+            temp.unlink(missing_ok=True)
+            if raise_errors:
+                raise
+            return False
+        os.replace(temp, self.feed)
+        await asyncio.to_thread(self._save, index, meta)
+        return True
+
+_catalogs: dict[str, VersionCatalog] = {}
+
+def get_catalog(name: str, url: str, parse: Callable[[Path], CatalogIndex]) -> VersionCatalog:
+    """Get the catalog of a feed, shared so its index is only loaded once."""
+    if name not in _catalogs:
+        _catalogs[name] = VersionCatalog(name, url, parse)
+    return _catalogs[name]
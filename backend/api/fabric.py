@@ -1,11 +1,14 @@
-import os, httpx, subprocess
+import asyncio, json, os
 from pathlib import Path
 from typing import Optional
-from helpers import download_file
+from backend.api.catalog import get_catalog
+from backend.api.mojang import download_minecraft_server, get_version_url
+from helpers import download_file, get_http_client, run_process
+from config import PROCESS_TIMEOUT
 
 async def get_latest_stable_fabric_installer():
     url = "https://meta.fabricmc.net/v2/versions/installer"
-    resp = httpx.get(url)
+    resp = await get_http_client().get(url)
     resp.raise_for_status()
     data = resp.json()
 
@@ -31,17 +34,66 @@ async def ensure_fabric_installer(installers_dir="installers") -> Path:
 async def get_fabric_versions(mc_version: str) -> list[dict]:
     """Return all Fabric loader versions for a given Minecraft version."""
     url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}"
-    resp = httpx.get(url)
-    resp.raise_for_status()
-    data = resp.json()
 
-    return [{"version": v["loader"]["version"], "stable": v["loader"]["stable"]} for v in data]
+    def parse(path: Path) -> dict[str, list[dict]]:
+        data = json.loads(path.read_bytes())
+        return {mc_version: [{"version": v["loader"]["version"], "stable": v["loader"]["stable"]} for v in data]}
+
+    return await get_catalog(f"fabric-{mc_version}", url, parse).get(mc_version)
+
+def get_installer_version(installer_path: Path) -> str:
+    """Get the version of a fabric-installer-<ver>.jar from its name."""
+    return installer_path.stem.removeprefix("fabric-installer-")
+
+async def download_fabric_server_launcher(install_dir: Path, mc_version: str, loader_version: str, installer_version: str) -> Path:
+    """Download the server launcher jar Fabric meta builds for a (Minecraft, loader, installer) version."""
+    url = f"https://meta.fabricmc.net/v2/versions/loader/{mc_version}/{loader_version}/{installer_version}/server/jar"
+    dest = install_dir / "fabric-server-launch.jar"
+    await download_file(url, dest)
+    return dest
+
+async def install_fabric_server(
+    install_dir: Path,
+    mc_version: str,
+    loader_version: str,
+    installer_version: str,
+    mc_version_url: Optional[str] = None
+):
+    """Set up a Fabric server with a few http requests instead of running the installer in a JVM.
+
+    The launcher jar from Fabric meta and the vanilla server jar are downloaded side by side,
+    the launcher fetches the Fabric libraries itself on the first start.
+
+    Args:
+        install_dir: Directory where to install the server
+        mc_version: Target Minecraft version (e.g. "1.20.1")
+        loader_version: Fabric loader version
+        installer_version: Fabric installer version the launcher is built with
+        mc_version_url: Url of the Minecraft version json, looked up if not given
+
+    Raises:
+        LookupError: If `mc_version` is not a known Minecraft release.
+        httpx.HTTPError | DownloadError: If a download failed.
+    """
+    mc_version_url = mc_version_url or await get_version_url(mc_version)
+    if mc_version_url is None:
+        raise LookupError(f"Unknown Minecraft version {mc_version}")
+
+    install_dir.mkdir(parents=True, exist_ok=True)
+    await asyncio.gather(
+        download_fabric_server_launcher(install_dir, mc_version, loader_version, installer_version),
+        download_minecraft_server(mc_version_url, install_dir),
+    )
+    return 0
 
 async def run_fabric_installer(
     install_dir: Path,
     installer_path: Path,
     mc_version: str,
-    loader_version: Optional[str] = None
+    loader_version: Optional[str] = None,
+    line_cb=None,
+    cancel_event=None,
+    timeout: float = PROCESS_TIMEOUT
 ):
     """Run the Fabric installer to set up a server.
 
@@ -50,6 +102,9 @@ async def run_fabric_installer(
         mc_version: Target Minecraft version (e.g. "1.20.1")
         loader_version: Optional Fabric loader version
         install_dir: Directory where to install the server
+        line_cb: Called with every line the installer prints
+        cancel_event: Kills the installer when set
+        timeout: Seconds before the installer is killed, 0 = no limit
     """
     cmd = [
         "java", "-jar", installer_path,
@@ -62,8 +117,6 @@ async def run_fabric_installer(
         cmd += ["-loader", loader_version]
 
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        return await run_process(cmd, line_cb=line_cb, cancel_event=cancel_event, timeout=timeout)
     except Exception as e:
-        print(e)
         return e
-    return result.returncode
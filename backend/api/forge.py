@@ -1,25 +1,27 @@
-import httpx, subprocess, os
+import json, os
 from pathlib import Path
 from aioshutil import rmtree
+from backend.api.catalog import get_catalog
 from backend.api.mojang import download_minecraft_server
-from helpers import download_file
+from helpers import download_file, run_process, ProcessError
+from config import PROCESS_TIMEOUT
 
 async def get_forge_versions(mc_version: str) -> list[dict]:
     """Get all available Forge versions for a given Minecraft version."""
     url = f"https://files.minecraftforge.net/net/minecraftforge/forge/maven-metadata.json"
-    resp = httpx.get(url)
-    resp.raise_for_status()
-    data = resp.json()
-    
-    versions = []
-    for version in data[mc_version]:
-        versions.append({
+    return await get_catalog("forge", url, parse_forge_metadata).get(mc_version)
+
+def parse_forge_metadata(path: Path) -> dict[str, list[dict]]:
+    """Index the Forge maven-metadata.json by Minecraft version."""
+    data: dict[str, list[str]] = json.loads(path.read_bytes())
+    return {
+        mc_version: [{
             "mc_version": mc_version,
             "forge_version": version[len(mc_version)+1:],
             "full_version": version
-        })
-    
-    return versions
+        } for version in versions]
+        for mc_version, versions in data.items()
+    }
 
 async def download_forge_installer(mc_version: str, forge_version: str, installers_dir: str = "installers") -> Path:
     """Download Forge installer."""
@@ -36,15 +38,15 @@ async def download_forge_installer(mc_version: str, forge_version: str, installe
     await download_file(url, dest)
     return dest
 
-async def run_forge_installer(install_dir: Path, installer_path: Path, mc_version_url: str): # leaves behind log file in main directory
+async def run_forge_installer(install_dir: Path, installer_path: Path, mc_version_url: str, line_cb=None, cancel_event=None, timeout: float = PROCESS_TIMEOUT): # leaves behind log file in main directory
     """Run Forge installer."""
     cmd = ["java", "-jar", installer_path, "--installServer", install_dir]
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        returncode = await run_process(cmd, line_cb=line_cb, cancel_event=cancel_event, timeout=timeout)
         await download_minecraft_server(mc_version_url, install_dir)
         log_file = installer_path.name
         await rmtree(log_file, ignore_errors=True) # remove log file
-        return result.returncode
-    except subprocess.CalledProcessError as e:
+        return returncode
+    except ProcessError as e:
         return e
     
@@ -1,29 +1,248 @@
-import httpx, json
-from aiocache import cached
+import asyncio, httpx, json
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from urllib.parse import quote
 from backend.api import SourceAPI
+from helpers import get_http_client, http_cache, CacheEntry, MemoryCache, RateLimitScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from config import HTTP_CACHE_TTL, HTTP_CACHE_MAX_STALE, MEMORY_CACHE_MAX_BYTES, MODRINTH_CACHE_TTLS, MODRINTH_BATCH_URL_LENGTH, MODRINTH_BATCH_CONCURRENCY, MODRINTH_MAX_CONCURRENCY, MODRINTH_RATE_LIMIT_RETRIES
 
 MODRINTH_API = "https://api.modrinth.com/v2"
 MODLOADERS = {"fabric", "forge", "quilt", "neoforge"}
 USER_AGENT = "manyullyn/mineshell/0.1.0 (https://github.com/manyullyn)"
 HEADERS={"User-Agent": USER_AGENT}
 
-@cached(ttl=600, key_builder=lambda f, endpoint, params: (endpoint, tuple(sorted(params.items()))), skip_cache_func=lambda r: r is None or r == {})
-async def cached_request(endpoint: str, params: dict):
-    # convert dict to tuple for hashable cache key
-    return await _modrinth_request(endpoint, params)
+class RateLimitError(Exception):
+    """Modrinth still answered with 429 after all retries, the request failed and is not the same as an empty result."""
+    def __init__(self, retry_after: float):
+        super().__init__(f"Modrinth rate limit reached, try again in {max(1, round(retry_after))}s")
+        self.retry_after = retry_after
+
+class IncompleteResultError(Exception):
+    """Some requests of a batched lookup failed, the result would be missing objects that do exist."""
+    def __init__(self, failed_ids: list[str]):
+        super().__init__(f"Could not reach Modrinth for {len(failed_ids)} of the requested items")
+        self.failed_ids = failed_ids
+
+# all API requests go through the scheduler, with the priority of the task sending them
+scheduler = RateLimitScheduler(MODRINTH_MAX_CONCURRENCY)
+_priority: ContextVar[int] = ContextVar("modrinth_priority", default=PRIORITY_INTERACTIVE)
+
+@contextmanager
+def request_priority(priority: int):
+    """Send the Modrinth requests made inside the block with `priority`, e.g. `PRIORITY_BACKGROUND`."""
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+# parsed responses, sized by their body
+memory_cache = MemoryCache(MEMORY_CACHE_MAX_BYTES)
+
+def cache_ttl(endpoint: str) -> float:
+    """Get the seconds a response of `endpoint` is used without asking the server, see `MODRINTH_CACHE_TTLS`."""
+    return next((ttl for prefix, ttl in MODRINTH_CACHE_TTLS.items() if endpoint.startswith(prefix)), HTTP_CACHE_TTL)
 
-async def _modrinth_request(endpoint: str, params: dict) -> dict:
-    """Core API request, returns raw JSON."""
+async def cached_request(endpoint: str, params: dict):
+    """
+    GET request through the memory cache and the persistent http cache.
+
+    Responses younger than their `cache_ttl` are used without a request, outdated ones up to
+    `HTTP_CACHE_MAX_STALE` are used right away and revalidated in the background.
+    Older ones are revalidated before they're used, or used anyway if the request fails.
+
+    Concurrent calls for the same endpoint and params share a single lookup and request,
+    if it fails all of them get the error.
+    """
+    key = f"{endpoint}?{json.dumps(sorted(params.items()))}"
+    data = memory_cache.get(key)
+    if data is not None:
+        return data
+    # futures can only be awaited on their own event loop, thread workers run their own
+    flight = (asyncio.get_running_loop(), key)
+    future = _in_flight.get(flight)
+    if future is None:
+        request_stats.requests += 1
+        future = _in_flight[flight] = asyncio.ensure_future(_cached_request(key, endpoint, params))
+        future.add_done_callback(lambda _: _in_flight.pop(flight, None))
+    else:
+        request_stats.coalesced += 1
+    # a caller that is cancelled doesn't cancel the request for the others
+    return await asyncio.shield(future)
+
+@dataclass
+class RequestStats:
+    requests: int = 0 # lookups started by cached_request
+    coalesced: int = 0 # calls that joined a lookup already in flight instead of starting their own
+
+request_stats = RequestStats()
+_in_flight: dict[tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+async def _cached_request(key: str, endpoint: str, params: dict):
+    entry = await asyncio.to_thread(http_cache.get, key)
+    if entry is not None:
+        try:
+            data = json.loads(entry.body)
+        except ValueError:
+            entry, data = None, None
+        if entry is not None and entry.age < HTTP_CACHE_MAX_STALE:
+            ttl = cache_ttl(endpoint)
+            if entry.age < ttl:
+                memory_cache.set(key, data, len(entry.body), ttl - entry.age)
+            elif key not in _revalidating:
+                _revalidating[key] = asyncio.create_task(_revalidate_in_background(key, endpoint, params, entry))
+                _revalidating[key].add_done_callback(lambda _: _revalidating.pop(key, None))
+            return data
+    return await _revalidate(key, endpoint, params, entry)
+
+_revalidating: dict[str, asyncio.Task] = {} # background revalidations by key
+
+async def _revalidate_in_background(key: str, endpoint: str, params: dict, entry: CacheEntry):
+    # tasks run in a copy of the context, the caller keeps its priority
+    _priority.set(PRIORITY_BACKGROUND)
+    return await _revalidate(key, endpoint, params, entry)
+
+async def _revalidate(key: str, endpoint: str, params: dict, entry: CacheEntry | None):
+    """Request an endpoint with a conditional request for the cached entry and update the cache."""
+    headers = {}
+    if entry is not None:
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
     try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(
+        resp = await _modrinth_response(endpoint, params, headers=headers)
+        if resp.status_code == 304 and entry is not None:
+            await asyncio.to_thread(http_cache.touch, key)
+            data = json.loads(entry.body)
+            memory_cache.set(key, data, len(entry.body), cache_ttl(endpoint))
+            return data
+        resp.raise_for_status()
+        data = resp.json()
+    except (httpx.HTTPError, ValueError):
+        # offline or a server error, an outdated response is better than none
+        return json.loads(entry.body) if entry is not None else {}
+    except RateLimitError:
+        # never cached, callers without an outdated response get the error
+        if entry is not None:
+            return json.loads(entry.body)
+        raise
+    await asyncio.to_thread(http_cache.put, key, resp.content, resp.headers.get("ETag"), resp.headers.get("Last-Modified"))
+    memory_cache.set(key, data, len(resp.content), cache_ttl(endpoint))
+    return data
+
+async def fetch_by_ids(endpoint: str, item_endpoint: str, ids: list[str], max_age: float | None) -> dict[str, dict]:
+    """
+    Fetch objects by ID from a batch endpoint like `projects`, with every object cached on its own.
+
+    Objects are cached under the key of their single object endpoint (`item_endpoint/<id>`),
+    so lookups sharing most IDs with an earlier one only request the missing ones, and single lookups
+    through `cached_request` find them too. Cached objects older than `max_age` (`None` = no limit)
+    are requested again. The missing IDs are split into requests with URLs of safe length,
+    sent at the same time.
+
+    Returns:
+        Dictionary mapping id -> JSON object, IDs that don't exist are left out
+
+    Raises:
+        RateLimitError: If a request was still rate limited after all retries.
+        IncompleteResultError: If another request failed, the objects of the successful ones are cached anyway.
+    """
+    ids = list(dict.fromkeys(ids))
+    keys = {item_id: f"{item_endpoint}/{item_id}?[]" for item_id in ids}
+    entries = await asyncio.to_thread(http_cache.get_many, list(keys.values()))
+
+    results: dict[str, dict] = {}
+    missing: list[str] = []
+    for item_id in ids:
+        entry = entries.get(keys[item_id])
+        try:
+            if entry is not None and (max_age is None or entry.age < max_age):
+                results[item_id] = json.loads(entry.body)
+                continue
+        except ValueError:
+            pass
+        missing.append(item_id)
+
+    limit = asyncio.Semaphore(MODRINTH_BATCH_CONCURRENCY)
+    async def fetch_chunk(chunk: list[str]) -> list[dict]:
+        async with limit:
+            objects = await _modrinth_request(endpoint, {"ids": json.dumps(chunk)})
+        if not isinstance(objects, list):
+            # `_modrinth_request` returns {} for failed requests
+            raise IncompleteResultError(chunk)
+        return objects
+
+    chunks = chunk_ids(missing)
+    outcomes = await asyncio.gather(*(fetch_chunk(chunk) for chunk in chunks), return_exceptions=True)
+    fetched = [obj for objects in outcomes if isinstance(objects, list) for obj in objects]
+    await asyncio.to_thread(http_cache.put_many, {f"{item_endpoint}/{obj['id']}?[]": json.dumps(obj).encode() for obj in fetched})
+
+    errors = [outcome for outcome in outcomes if isinstance(outcome, BaseException)]
+    for error in errors:
+        # a rate limit says when to try again, it wins over failed requests
+        if not isinstance(error, IncompleteResultError):
+            raise error
+    if errors:
+        raise IncompleteResultError([item_id for error in errors for item_id in error.failed_ids])
+
+    results.update({obj["id"]: obj for obj in fetched})
+    return results
+
+def chunk_ids(ids: list[str], max_length: int = MODRINTH_BATCH_URL_LENGTH) -> list[list[str]]:
+    """Split IDs into chunks whose url encoded `ids` parameter stays below `max_length` characters."""
+    chunks: list[list[str]] = []
+    chunk: list[str] = []
+    length = len(quote('[]'))
+    for item_id in ids:
+        id_length = len(quote(json.dumps(item_id) + ', '))
+        if chunk and length + id_length > max_length:
+            chunks.append(chunk)
+            chunk, length = [], len(quote('[]'))
+        chunk.append(item_id)
+        length += id_length
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+async def _modrinth_response(endpoint: str, params: dict, method: str = "GET", body: dict | None = None, headers: dict | None = None) -> httpx.Response:
+    """
+    Send an API request through the rate limit scheduler, returns the response as is.
+
+    A request answered with 429 is queued again and sent once the rate limit resets,
+    up to `MODRINTH_RATE_LIMIT_RETRIES` times.
+
+    Raises:
+        RateLimitError: If the last retry was answered with 429 too.
+    """
+    for attempt in range(MODRINTH_RATE_LIMIT_RETRIES + 1):
+        async with scheduler.slot(_priority.get()):
+            resp = await get_http_client().request(
+                method,
                 f"{MODRINTH_API}/{endpoint}",
                 params=params,
+                json=body,
                 timeout=15.0,
-                headers=HEADERS
+                headers={**HEADERS, **(headers or {})}
             )
-            resp.raise_for_status()
-            return resp.json()
+            scheduler.update(resp.headers)
+            if resp.status_code != 429:
+                return resp
+            retry_after = scheduler.limited(resp.headers)
+    raise RateLimitError(retry_after)
+
+async def _modrinth_request(endpoint: str, params: dict, method: str = "GET", body: dict | None = None) -> dict:
+    """
+    Core API request, returns raw JSON, `{}` if the request failed.
+
+    Raises:
+        RateLimitError: If the rate limit was still exceeded after all retries.
+    """
+    try:
+        resp = await _modrinth_response(endpoint, params, method, body)
+        resp.raise_for_status()
+        return resp.json()
     except (httpx.ReadTimeout, httpx.TimeoutException, httpx.HTTPStatusError):
         return {}
 
@@ -37,8 +256,12 @@ class ModrinthAPI(SourceAPI):
                 "limit": limit
             }
             results: list[dict] = (await cached_request("search", params))["hits"]
+            all_categories = await self.get_categories()
         except KeyError:
             return '', []
+        except RateLimitError as e:
+            # shown as the title of the empty selector, so it doesn't read as no results
+            return str(e), []
 
         # Build rows for the modal: [project_id, title, slug, downloads, client/server]
         rows = []
@@ -48,7 +271,7 @@ class ModrinthAPI(SourceAPI):
                 "author": hit["author"],
                 "downloads": f"{hit['downloads']:,}", # format downloads with commas
                 "modloader": await self._get_modloader_from_categories(hit["categories"]),
-                "categories": await self._get_only_categories_from_categories(hit["categories"]),
+                "categories": await self._get_only_categories_from_categories(hit["categories"], all_categories),
                 "slug": hit["slug"],
                 "description": hit["description"],
             })
@@ -65,9 +288,8 @@ class ModrinthAPI(SourceAPI):
                 loaders.append(cat_lower.title())
         return loaders
     
-    async def _get_only_categories_from_categories(self, categories: list[str]) -> list[str]:
+    async def _get_only_categories_from_categories(self, categories: list[str], all_categories: list[str]) -> list[str]:
         categories_list: list = []
-        all_categories = await self.get_categories()
         for cat in categories:
             cat_lower = cat.lower()
             if cat_lower in all_categories:
@@ -82,11 +304,8 @@ class ModrinthAPI(SourceAPI):
         Sorted newest first.
         """
         versions: list[dict] = await cached_request(f"project/{modpack_id}/version", {})
-        # Sort newest first
-        versions.sort(key=lambda v: v["date_published"], reverse=True)
-
-        # Build simplified list
-        return versions
+        # Sort newest first, into a new list since the cached one is shared
+        return sorted(versions, key=lambda v: v["date_published"], reverse=True)
     
     async def get_modlist(self, dependencies: dict) -> list[dict]:
         """
@@ -104,6 +323,9 @@ class ModrinthAPI(SourceAPI):
 
         Returns:
             List of dictionaries representing server-side mods in the modpack
+
+        Raises:
+            RateLimitError | IncompleteResultError: If some of the mods could not be requested.
         """
         # Extract project IDs from the modpack version's dependencies
         project_ids = [dep["project_id"] for dep in dependencies if dep["project_id"]]
@@ -134,6 +356,8 @@ class ModrinthAPI(SourceAPI):
                 "date_published": version.get("date_published"),
                 "file_name": version["files"][0]["filename"] if version.get("files") else None,
                 "download_url": version["files"][0]["url"] if version.get("files") else None,
+                "file_size": version["files"][0].get("size") if version.get("files") else None,
+                "hashes": version["files"][0].get("hashes") if version.get("files") else None,
                 "loaders": project.get("loaders"),
                 "type": 'datapack' if 'datapack' in project.get("loaders", []) else 'mod'
             })
@@ -173,6 +397,7 @@ class ModrinthAPI(SourceAPI):
             }
 
             results: list[dict] = (await cached_request("search", params))["hits"]
+            all_categories = await self.get_categories()
         except KeyError:
             return []
 
@@ -193,7 +418,7 @@ class ModrinthAPI(SourceAPI):
                 "author": hit["author"],
                 "downloads": f"{hit['downloads']:,}", # format downloads with commas
                 "modloader": await self._get_modloader_from_categories(hit["categories"]),
-                "categories": await self._get_only_categories_from_categories(hit["categories"]),
+                "categories": await self._get_only_categories_from_categories(hit["categories"], all_categories),
                 "slug": hit["slug"],
                 "description": hit["description"],
                 "type": sorted(type),
@@ -231,10 +456,8 @@ class ModrinthAPI(SourceAPI):
 
         versions: list[dict] = await cached_request(f"project/{project_id}/version", params)
 
-        # Sort newest first
-        versions.sort(key=lambda v: v["date_published"], reverse=True)
-
-        return versions
+        # Sort newest first, into a new list since the cached one is shared
+        return sorted(versions, key=lambda v: v["date_published"], reverse=True)
 
     async def fetch_projects(self, project_ids: list[str], filter_server_side: bool = True) -> dict[str, dict]:
         """
@@ -246,16 +469,15 @@ class ModrinthAPI(SourceAPI):
  
         Returns:
             Dictionary mapping project_id -> project JSON object
+
+        Raises:
+            RateLimitError | IncompleteResultError: If some of the projects could not be requested.
         """
         if not project_ids:
             return {}
 
-        params = {
-            "ids": json.dumps(project_ids),
-        }
-        projects_list: list[dict] = await cached_request("projects", params)
-        
-        projects_dict = {proj["id"]: proj for proj in projects_list}
+        # side support and names rarely change, cached projects are reused for as long as stale responses are
+        projects_dict = await fetch_by_ids("projects", "project", project_ids, HTTP_CACHE_MAX_STALE)
 
         if filter_server_side:
             # Filter server-side mods
@@ -276,19 +498,41 @@ class ModrinthAPI(SourceAPI):
 
         Returns:
             Dictionary mapping version_id -> version JSON object
+
+        Raises:
+            RateLimitError | IncompleteResultError: If some of the versions could not be requested.
         """
         if not version_ids:
             return []
 
-        params = {
-            "ids": json.dumps(version_ids),
-        }
-        versions_list: list[dict] = await cached_request("versions", params)
+        # the files of a published version never change
+        versions = await fetch_by_ids("versions", "version", version_ids, None)
+        return [versions[version_id] for version_id in dict.fromkeys(version_ids) if version_id in versions]
 
-        return versions_list
+    async def fetch_versions_by_hash(self, hashes: list[str], algorithm: str = "sha1") -> dict[str, dict]:
+        """
+        Fetch the versions owning a list of file hashes from Modrinth, in a single request.
+
+        Args:
+            hashes: List of file hashes
+            algorithm: Hash algorithm of `hashes`, "sha1" or "sha512"
+
+        Returns:
+            Dictionary mapping hash -> version JSON object, unknown hashes are left out
+        """
+        if not hashes:
+            return {}
+
+        # not cached, the hashes are only looked up once per install
+        return await _modrinth_request("version_files", {}, "POST", {"hashes": hashes, "algorithm": algorithm})
 
     async def get_categories(self) -> list[str]:
-        """Get a list of mod categories from Modrinth."""
+        """
+        Get a list of mod categories from Modrinth.
+
+        Raises:
+            RateLimitError: If the categories were never loaded and the rate limit is exceeded.
+        """
         raw_categories = await cached_request("tag/category", {})
 
         categories: list[str] = [
@@ -1,8 +1,9 @@
-import httpx
+import asyncio, hashlib, httpx, os, re, uuid
 import json
 from pathlib import Path
 from datetime import datetime, timedelta
-from helpers import download_file
+from helpers import download_file, get_http_client, hash_file, link_file
+from config import MINECRAFT_CACHE_ENABLED, MINECRAFT_CACHE_DIR
 
 CACHE_FILE = Path("version_manifest_v2.json")
 CACHE_EXPIRATION = timedelta(days=1)
@@ -11,10 +12,9 @@ async def _fetch_manifest_from_api():
     """Fetches the Minecraft version manifest from Mojang's API."""
     manifest_url = 'https://launchermeta.mojang.com/mc/game/version_manifest_v2.json'
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(manifest_url)
-            resp.raise_for_status()
-            return resp.json()
+        resp = await get_http_client().get(manifest_url, timeout=10)
+        resp.raise_for_status()
+        return resp.json()
     except (httpx.RequestError, httpx.HTTPStatusError):
         return None
 
@@ -61,15 +61,86 @@ async def get_minecraft_versions() -> list[dict]:
 
     return releases
 
-async def download_minecraft_server(version_json_url: str, dest_dir: Path):
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(version_json_url)
+async def get_version_url(mc_version: str) -> str | None:
+    """Get the url of the version json of a Minecraft release, `None` if it's not a known release."""
+    return next((version["url"] for version in await get_minecraft_versions() if version["id"] == mc_version), None)
+
+class MinecraftCache:
+    """
+    Version jsons and vanilla server jars, shared by all instances so each is only downloaded once.
+
+    Stored as `<root>/<version>/version.json` and `<root>/<version>/server.jar`.
+    Both are checked against the sha1 Mojang publishes (in the version json url and in the version json)
+    every time they're used, a broken or outdated file is downloaded again.
+    Server jars are linked into instances with `link_file`.
+    """
+    def __init__(self, root: Path, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+
+    async def get_version_json(self, version_json_url: str) -> dict:
+        """Get the version json behind a url from the manifest, from the cache if it's there."""
+        name = Path(version_json_url).stem
+        path = self.root / name / 'version.json'
+        # piston-meta urls contain the sha1 of the file, .../v1/packages/<sha1>/<version>.json
+        match = re.search(r'/([0-9a-f]{40})/', version_json_url)
+        expected = match.group(1) if match else None
+
+        if self.enabled:
+            try:
+                data = await asyncio.to_thread(path.read_bytes)
+                if expected is None or hashlib.sha1(data).hexdigest() == expected:
+                    return json.loads(data)
+            except (OSError, ValueError):
+                pass
+
+        resp = await get_http_client().get(version_json_url)
         resp.raise_for_status()
         version_data = resp.json()
+        if self.enabled and (expected is None or hashlib.sha1(resp.content).hexdigest() == expected):
+            path.parent.mkdir(parents=True, exist_ok=True)
+            temp = path.with_name(f"version.json.{uuid.uuid4().hex}")
+            temp.write_bytes(resp.content)
+            os.replace(temp, path)
+        return version_data
+
+    async def get_server_jar(self, version_data: dict) -> Path:
+        """
+        Get the cached server jar of a version, downloading it if it's missing or doesn't match its sha1.
+
+        Raises:
+            httpx.HTTPError | DownloadError: If the download failed.
+        """
+        server = version_data["downloads"]["server"]
+        sha1 = server.get("sha1")
+        path = self.root / version_data["id"] / 'server.jar'
+        if path.exists() and (sha1 is None or await asyncio.to_thread(hash_file, path, "sha1") == sha1):
+            return path
+
+        # every install downloads to its own file, installs running at the same time don't write into each other
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temp = path.with_name(f"server.jar.{uuid.uuid4().hex}")
+        try:
+            await download_file(server["url"], temp, hashes={"sha1": sha1} if sha1 else None)
+            os.replace(temp, path)
+        finally:
+            temp.unlink(missing_ok=True)
+            temp.with_name(temp.name + '.part').unlink(missing_ok=True)
+        return path
 
-    server_url = version_data["downloads"]["server"]["url"]
+minecraft_cache = MinecraftCache(Path(MINECRAFT_CACHE_DIR), MINECRAFT_CACHE_ENABLED)
+
+async def download_minecraft_server(version_json_url: str, dest_dir: Path):
+    version_data = await minecraft_cache.get_version_json(version_json_url)
+
+    server = version_data["downloads"]["server"]
     server_filename = "server.jar"
     dest_path = dest_dir / server_filename
 
-    await download_file(server_url, dest_path)
+    if not minecraft_cache.enabled:
+        await download_file(server["url"], dest_path, hashes={"sha1": server["sha1"]} if server.get("sha1") else None)
+        return dest_path
+
+    cached = await minecraft_cache.get_server_jar(version_data)
+    await asyncio.to_thread(link_file, cached, dest_path)
     return dest_path
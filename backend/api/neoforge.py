@@ -1,35 +1,41 @@
-import httpx, subprocess, os
+import os
 from pathlib import Path
 from aioshutil import rmtree
 from xml.etree import ElementTree as ET
+from backend.api.catalog import get_catalog
 from backend.api.mojang import download_minecraft_server
-from helpers import download_file
+from helpers import download_file, run_process, ProcessError
+from config import PROCESS_TIMEOUT
 
 async def get_neoforge_versions(mc_version: str) -> list[dict]:
     """Get all available NeoForge versions for a given Minecraft version."""
     # NeoForge uses a different metadata structure
     url = "https://maven.neoforged.net/releases/net/neoforged/neoforge/maven-metadata.xml"
-    resp = httpx.get(url)
-    resp.raise_for_status()
-    
-    # Parse XML response
-    root = ET.fromstring(resp.text)
-    
-    parts = mc_version.split('.')
-    mc_minor_version = '.'.join(parts[1:]) if len(parts) > 1 else mc_version  # e.g. "20.1" from "1.20.1"
-
-    versions = []
-    for version_elem in root.findall(".//version"):
-        version = version_elem.text
-        if version and version.startswith(mc_minor_version):
-            neoforge_version = version[len(mc_minor_version)+1:]
-            versions.append({
-                "mc_version": mc_version,
-                "neoforge_version": neoforge_version,
-                "full_version": version
-            })
-    
-    return versions
+    return await get_catalog("neoforge", url, parse_neoforge_metadata).get(mc_version)
+
+def parse_neoforge_metadata(path: Path) -> dict[str, list[dict]]:
+    """
+    Index the NeoForge maven-metadata.xml by Minecraft version.
+
+    The file is parsed incrementally, only one <version> element is kept in memory at a time.
+    NeoForge versions start with the Minecraft version without the leading "1.", e.g. 21.1.77 is for 1.21.1
+    and 21.0.167 for 1.21.
+    """
+    index: dict[str, list[dict]] = {}
+    for _, elem in ET.iterparse(path):
+        if elem.tag == 'version' and elem.text:
+            version = elem.text
+            parts = version.split('.')
+            if len(parts) > 2 and parts[0].isdigit() and parts[1].isdigit():
+                mc_minor_version = f"{parts[0]}.{parts[1]}" if parts[1] != '0' else parts[0]  # e.g. "20.1" for 1.20.1
+                mc_version = f"1.{mc_minor_version}"
+                index.setdefault(mc_version, []).append({
+                    "mc_version": mc_version,
+                    "neoforge_version": version[len(mc_minor_version)+1:],
+                    "full_version": version
+                })
+        elem.clear()
+    return index
 
 async def download_neoforge_installer(mc_version: str, neoforge_version: str, installers_dir: str = "installers") -> Path: # neoforge_version is like "21.1.77", minecraft version not needed
     """Download NeoForge installer."""
@@ -47,15 +53,15 @@ async def download_neoforge_installer(mc_version: str, neoforge_version: str, in
     await download_file(url, dest)
     return dest
 
-async def run_neoforge_installer(install_dir: Path, installer_path: Path, mc_version_url: str): # leaves behind log file in main directory
+async def run_neoforge_installer(install_dir: Path, installer_path: Path, mc_version_url: str, line_cb=None, cancel_event=None, timeout: float = PROCESS_TIMEOUT): # leaves behind log file in main directory
     """Run NeoForge installer (same as Forge)."""
     cmd = ["java", "-jar", installer_path, "--installServer", install_dir]
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
+        returncode = await run_process(cmd, line_cb=line_cb, cancel_event=cancel_event, timeout=timeout)
         await download_minecraft_server(mc_version_url, install_dir)
         log_file = installer_path.name
         await rmtree(log_file, ignore_errors=True) # remove log file
-        return result.returncode
-    except subprocess.CalledProcessError as e:
+        return returncode
+    except ProcessError as e:
         return e
     
@@ -1,24 +1,27 @@
-import httpx, subprocess, os
+import json, os
 from pathlib import Path
-from helpers import download_file
+from backend.api.catalog import get_catalog
+from helpers import download_file, get_http_client, run_process, ProcessError
+from config import PROCESS_TIMEOUT
 
 async def get_quilt_versions(mc_version: str) -> list[dict]:
     """Get all available Quilt loader versions for a given Minecraft version."""
     url = f"https://meta.quiltmc.org/v3/versions/loader/{mc_version}"
-    resp = httpx.get(url)
-    resp.raise_for_status()
-    data = resp.json()
-    
-    return [{
-        "version": loader["loader"]["version"],
-        "build": loader["loader"]["build"],
-        "release": False if 'beta' in loader["loader"]["version"] or 'pre' in loader["loader"]["version"] else True
-    } for loader in data]
+
+    def parse(path: Path) -> dict[str, list[dict]]:
+        data = json.loads(path.read_bytes())
+        return {mc_version: [{
+            "version": loader["loader"]["version"],
+            "build": loader["loader"]["build"],
+            "release": False if 'beta' in loader["loader"]["version"] or 'pre' in loader["loader"]["version"] else True
+        } for loader in data]}
+
+    return await get_catalog(f"quilt-{mc_version}", url, parse).get(mc_version)
 
 async def get_latest_quilt_installer():
     """Get latest Quilt installer."""
     url = "https://meta.quiltmc.org/v3/versions/installer"
-    resp = httpx.get(url)
+    resp = await get_http_client().get(url)
     resp.raise_for_status()
     data = resp.json()
     
@@ -46,7 +49,10 @@ async def run_quilt_installer(
     install_dir: Path,
     installer_path: Path,
     mc_version: str,
-    loader_version: str=''
+    loader_version: str='',
+    line_cb=None,
+    cancel_event=None,
+    timeout: float = PROCESS_TIMEOUT
 ):
     """Run Quilt installer."""
     cmd = [
@@ -59,8 +65,7 @@ async def run_quilt_installer(
     ]
     
     try:
-        result = subprocess.run(cmd, check=True, capture_output=True, text=True)
-        return result.returncode
-    except subprocess.CalledProcessError as e:
+        return await run_process(cmd, line_cb=line_cb, cancel_event=cancel_event, timeout=timeout)
+    except ProcessError as e:
         return e
 
@@ -1,9 +1,9 @@
-import asyncio, json, zipfile, os
-from aioshutil import rmtree, copy2, move
+import asyncio, re
+from aioshutil import rmtree, move
 from pathlib import Path
 from datetime import datetime
 
-from backend.api.fabric import ensure_fabric_installer, run_fabric_installer
+from backend.api.fabric import ensure_fabric_installer, run_fabric_installer, install_fabric_server, get_installer_version
 from backend.api.forge import download_forge_installer, run_forge_installer
 from backend.api.neoforge import download_neoforge_installer, run_neoforge_installer
 from backend.api.quilt import ensure_quilt_installer, run_quilt_installer
@@ -11,111 +11,147 @@ from backend.api.quilt import ensure_quilt_installer, run_quilt_installer
 # - add other source apis
 import backend.api.modrinth as modrinth
 
-from backend.storage import InstanceConfig, ModEntry
-from helpers import sanitize_filename, download_file
+from backend.installer.modpack import async_read_manifest, async_extract_overrides, override_folders, instance_relative_path, MANIFEST_FILES
+from backend.installer.plan import plan_modpack_download, plan_modpack_install
+from backend.installer.templates import modloader_templates, materialize_template
+from backend.storage import InstanceConfig, ModEntry, InstallJournal
+from helpers import sanitize_filename, download_file, DownloadJob, DownloadScheduler, TokenBucket, ProgressBus, PRIORITY_BACKGROUND
 
 installers_dir = Path("installers")
 
 # Steps:
 # 1. Download Modpack
-# 2. Extract Modpack
+# 2. Read Modpack
 # 3. Install Modloader
-# 4. Copy Overrides
+# 4. Extract Overrides
 # 5. Get Modlist
 # 6. Download Mods
 # 7. Finalize Installation
 
-async def install_modpack(instance: InstanceConfig, steps: list[str], dependencies: list[dict], progress_bar_callback, step_callback, cancel_event: asyncio.Event, modlist: list[dict] | None = None, mc_version_url: str | None = None) -> tuple[int, str]:
-    async def smooth_step_callback(step: str, label_id: int=1):
-        step_callback(step, label_id)
+async def install_modpack(instance: InstanceConfig, steps: list[str], dependencies: list[dict], progress: ProgressBus, cancel_event: asyncio.Event, modlist: list[dict] | None = None, mc_version_url: str | None = None, modpack_file: dict | None = None, bandwidth_limit: float = 0, disk_write_limit: float = 0) -> tuple[int, str]:
+    async def smooth_step_callback(text: str):
+        progress.status(text)
         await asyncio.sleep(0.1)
 
-    if Path('downloads').exists():
-        await rmtree(Path('downloads'), ignore_errors=True)
+    # per install limits in bytes per second (0 = unlimited), on top of the global ones
+    job_disk_write = TokenBucket(disk_write_limit)
+    limits = [TokenBucket(bandwidth_limit), job_disk_write]
+
+    # work completed by a previous attempt is skipped, the journal is kept until the install finished
+    instance_path = instance.path
+    journal = InstallJournal.load(instance_path)
+    if journal is None or not journal.matches(instance, 'modpack'):
+        journal = InstallJournal.new(instance, 'modpack')
 
     # 1. Download Modpack
-    step_callback(steps[0], 0)
-    progress_bar_callback(total=100, progress=0, bar_id=0)
-    progress_bar_callback(total=100, progress=0)
+    progress.step_started(1, steps[0])
     await asyncio.sleep(0.1)
 
     modpack_url = str(instance.modpack_url)
     filename = sanitize_filename(f"{instance.modpack_name}-{instance.modpack_version}")
     modpack_path = Path(f"downloads/{filename}.zip")
+    modpack_hashes = (modpack_file or {}).get("hashes")
+
+    # fail early if the modpack and modloader alone don't fit, the full check follows once the pack is downloaded
+    if error := plan_modpack_download(instance, modpack_path, modpack_file).check_disk_space():
+        return 1, error
+
     try:
-        step_callback(f'Downloading {instance.modpack_name}')
-        await download_file(modpack_url, modpack_path, progress_bar_callback, 1, cancel_event)
+        progress.status(f'Downloading {instance.modpack_name}')
+        # downloads are only renamed into place once complete, a leftover zip from a previous attempt can be reused
+        # unfinished downloads are resumed from their .part file, with hashes download_file checks the leftover itself
+        if not (journal.is_step_done(1) and modpack_path.exists()) and (modpack_hashes or not modpack_path.exists()):
+            await download_file(modpack_url, modpack_path, progress.bytes, 1, cancel_event, modpack_hashes, limits=limits)
     except Exception as e:
         return 1, str(e)
 
     if cancel_event.is_set():
         return -1, 'cancelled'
+    journal.complete_step(1, instance_path)
+    progress.step_finished(1)
 
-    # 2. Extract Modpack
-    step_callback(steps[1], 0)
+    # 2. Read Modpack
+    progress.step_started(2, steps[1])
+    await smooth_step_callback('Reading Modpack Index')
 
-    extract_path = Path(f"downloads/{filename}_temp")
+    # the index is read straight from the zip, nothing is extracted to a temporary folder
     try:
-        await async_extract_zip(modpack_path, extract_path, progress_bar_callback, step_callback, 2, cancel_event)
+        manifest = await async_read_manifest(instance.modpack_source, modpack_path)
     except Exception as e:
         return 2, str(e)
-    
+    if manifest is None and instance.modpack_source in MANIFEST_FILES:
+        return 2, f'Modpack has no {MANIFEST_FILES[instance.modpack_source]}'
+    progress.items(100, 50, step=2)
+
+    # plan every write of the install from the pack, before writing anything
+    await smooth_step_callback('Checking Disk Space')
+    try:
+        plan = await plan_modpack_install(instance, modpack_path, manifest, modpack_file, modlist)
+    except Exception as e:
+        return 2, str(e)
+    if error := plan.check_disk_space():
+        return 2, error
+    progress.step_weights(plan.step_weights(len(steps)))
+    progress.items(100, 100, step=2)
+
     if cancel_event.is_set():
         return -1, 'cancelled'
+    progress.step_finished(2)
 
     # 3. Install Modloader
-    step_callback(steps[2], 0)
-
-    progress_bar_callback(total=100, progress=0)
+    progress.step_started(3, steps[2])
     await smooth_step_callback('Getting version info')
     mc_version = instance.minecraft_version
-    instance.modloader_version = await get_modloader_version(instance.modpack_source, extract_path)
+    instance.modloader_version = await get_modloader_version(instance.modpack_source, manifest)
     loader_version = instance.modloader_version
-    instance_path = instance.path
     instance_path.mkdir(parents=True, exist_ok=True)
-    progress_bar_callback(total=100, progress=25, step=3)
+    progress.items(100, 25, step=3)
 
-    await smooth_step_callback(f'Checking for {instance.formatted_modloader()} installer')
-    installer_jar = await get_server_installer(instance)
-    if installer_jar is None or isinstance(installer_jar, Exception):
-        return 3, 'Could not get installer'
-    progress_bar_callback(total=100, progress=50, step=3)
+    if journal.is_step_done(3):
+        await smooth_step_callback(f'{instance.formatted_modloader()} already installed')
+    else:
+        await smooth_step_callback(f'Checking for {instance.formatted_modloader()} installer')
+        installer_jar = await get_server_installer(instance)
+        if installer_jar is None or isinstance(installer_jar, Exception):
+            return 3, 'Could not get installer'
+        progress.items(100, 50, step=3)
 
-    if cancel_event.is_set():
-        return -1, 'cancelled'
+        if cancel_event.is_set():
+            return -1, 'cancelled'
 
-    await smooth_step_callback(f'Running {instance.formatted_modloader()} installer')
-    result = await install_server(Path("instances") / instance.instance_id, installer_jar, instance.modloader, mc_version, loader_version, mc_version_url)
-    if result != 0 or isinstance(result, Exception):
-        return 3, str(result)
-    progress_bar_callback(total=100, progress=100, step=3)
+        await smooth_step_callback(f'Running {instance.formatted_modloader()} installer')
+        result = await install_server_from_template(Path("instances") / instance.instance_id, installer_jar, instance.modloader, mc_version, loader_version, mc_version_url, progress, 3, cancel_event, [job_disk_write])
+        if cancel_event.is_set():
+            return -1, 'cancelled'
+        if result != 0 or isinstance(result, Exception):
+            return 3, str(result)
+    progress.items(100, 100, step=3)
     await asyncio.sleep(0.1)
 
     if cancel_event.is_set():
         return -1, 'cancelled'
+    journal.complete_step(3, instance_path)
+    progress.step_finished(3)
+
+    # 4. Extract Overrides
+    progress.step_started(4, steps[3])
+
+    # overrides are streamed from the zip into the instance, client only folders are skipped without being written
+    # - add getting datapacks folder path
+    # - skip all resourcepacks and shaderpacks folders (eg in config/paxi/)
+    # files extracted by a previous attempt are kept, once the step is done nothing is extracted again (datapacks were moved since)
+    def skip_override(relative, info) -> bool:
+        return journal.is_step_done(4) or journal.has_file(relative.as_posix(), instance_path)
+
+    def override_extracted(relative, size: int):
+        journal.complete_file(relative.as_posix(), size, instance_path)
+
+    try:
+        overrides = await async_extract_overrides(modpack_path, instance_path, override_folders(instance.modpack_source, manifest), progress.bytes, progress.status, 4, cancel_event, [job_disk_write], skip=skip_override, file_cb=override_extracted)
+    except Exception as e:
+        journal.save(instance_path)
+        return 4, str(e)
 
-    # 4. Copy Overrides
-    step_callback(steps[3], 0)
-    await smooth_step_callback('Removing client only overrides')
-
-    overrides_path = extract_path / "overrides"
-    if overrides_path.exists():
-        # - add getting datapacks folder path
-        for folder in ['resourcepacks', 'shaderpacks']:
-            # - delete all resourcepacks and shaderpacks folders (eg in config/paxi/)
-            bad_path = overrides_path / folder
-            if bad_path.exists():
-                try:
-                    await rmtree(bad_path, ignore_errors=True)
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    return 4, str(e)
-        try:
-            await copytree_with_progress(overrides_path, instance_path, True, progress_bar_callback, step_callback, 4)
-        except Exception as e:
-            return 4, str(e)
-        
     if cancel_event.is_set():
         return -1, 'cancelled'
 
@@ -131,19 +167,31 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
 
     if cancel_event.is_set():
         return -1, 'cancelled'
+    journal.complete_step(4, instance_path)
+    progress.step_finished(4)
 
     # 5. Get Modlist
-    step_callback(steps[4], 0)
-    progress_bar_callback(total=100, progress=0, step=5)
+    progress.step_started(5, steps[4])
+
+    if not modlist:
+        # the modpack index already lists every file, no need to ask the api, metadata is resolved after the install
+        await smooth_step_callback('Reading Modpack Index')
+        modlist = await get_index_modlist(instance.modpack_source, manifest)
 
     if not modlist:
         await smooth_step_callback('Getting Project Ids')
         project_ids = [dep["project_id"] for dep in dependencies if dep["project_id"]]
         # - make source agnostic
-        projects = await modrinth.ModrinthAPI().fetch_projects(project_ids)
+        try:
+            projects = await modrinth.ModrinthAPI().fetch_projects(project_ids)
+        except modrinth.RateLimitError as e:
+            return 5, str(e)
+        except modrinth.IncompleteResultError:
+            # a partial modlist would install as a success with mods missing
+            return 5, 'Could not get Projects'
         if not projects:
             return 5, 'Could not get Projects'
-        progress_bar_callback(total=100, progress=33, step=5)
+        progress.items(100, 33, step=5)
 
         if cancel_event.is_set():
             return -1, 'cancelled'
@@ -151,10 +199,15 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
         await smooth_step_callback('Getting Version Ids')
         version_ids = [dep["version_id"] for dep in dependencies if dep["project_id"] in projects]
         # - make source agnostic
-        versions = await modrinth.ModrinthAPI().fetch_versions(version_ids)
+        try:
+            versions = await modrinth.ModrinthAPI().fetch_versions(version_ids)
+        except modrinth.RateLimitError as e:
+            return 5, str(e)
+        except modrinth.IncompleteResultError:
+            return 5, 'Could not get Versions'
         if not versions:
             return 5, 'Could not get Versions'
-        progress_bar_callback(total=100, progress=66, step=5)
+        progress.items(100, 66, step=5)
 
         if cancel_event.is_set():
             return -1, 'cancelled'
@@ -163,55 +216,63 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
         modlist = await combine_project_and_version_info(projects, versions)
     else:
         await smooth_step_callback('Getting Modlist')
-    mods = [e for e in modlist if e["type"] == "mod"]
-    datapacks = [e for e in modlist if e["type"] == "datapack"]
-    progress_bar_callback(total=100, progress=100, step=5)
+    progress.items(100, 100, step=5)
     await asyncio.sleep(0.1)
 
     if cancel_event.is_set():
         return -1, 'cancelled'
+    progress.step_finished(5)
 
     # 6. Download Mods
-    step_callback(steps[5], 0)
-    len_mods = len(modlist)
-    progress_bar_callback(total=len_mods, progress=0, step=6)
-    mod_num = 0
+    progress.step_started(6, steps[5])
+    # the modpack index lists alternative download urls for its files
+    mirrors = await get_index_mirrors(instance.modpack_source, manifest)
+    def get_mirrors(entry: dict) -> list[str]:
+        return mirrors.get((entry.get("hashes") or {}).get("sha1", ''), [])
+
+    def get_dest(entry: dict) -> Path:
+        # files from the index keep the path the modpack put them at
+        if entry.get("path"):
+            return instance_path / entry["path"]
+        # - use custom datapacks path if available
+        folder = Path('mods') if entry["type"] == 'mod' else Path('world') / 'datapacks'
+        return instance_path / folder / entry["file_name"]
+
+    # files downloaded by a previous attempt are not checked or downloaded again
+    jobs = [
+        DownloadJob(url=entry["download_url"], dest=get_dest(entry), size=entry.get("file_size") or 0, name=entry["name"], hashes=entry.get("hashes"), mirrors=get_mirrors(entry))
+        for entry in modlist
+        if not journal.has_file(get_dest(entry).relative_to(instance_path).as_posix(), instance_path)
+    ]
+
+    def job_downloaded(job: DownloadJob):
+        journal.complete_file(job.dest.relative_to(instance_path).as_posix(), job.dest.stat().st_size, instance_path)
+
+    scheduler = DownloadScheduler(progress_cb=progress.bytes, item_cb=progress.status, step=6, cancel_event=cancel_event, limits=limits, job_cb=job_downloaded)
 
     try:
-        for mod in mods:
-            await download_file(mod["download_url"], instance_path / 'mods' / mod["file_name"])
-            mod_num += 1
-            step_callback(f'Downloading {mod["name"]}')
-            progress_bar_callback(total=len_mods, progress=mod_num, step=6)
-            if cancel_event.is_set():
-                return -1, 'cancelled'
-
-        for datapack in datapacks:
-            # - use custom datapacks path if available
-            await download_file(datapack["download_url"], instance_path / 'world' / 'datapacks' / datapack["file_name"])
-            mod_num += 1
-            step_callback(f'Downloading {datapack["name"]}')
-            progress_bar_callback(total=len_mods, progress=mod_num, step=6)
-            if cancel_event.is_set():
-                return -1, 'cancelled'
+        await scheduler.run(jobs)
     except Exception as e:
+        journal.save(instance_path)
         return 6, str(e)
     
     if cancel_event.is_set():
         return -1, 'cancelled'
+    journal.complete_step(6, instance_path)
+    progress.step_finished(6)
 
     # 7. Finalize Installation
-    step_callback(steps[6], 0)
+    progress.step_started(7, steps[6])
+    len_mods = len(modlist)
     total = len_mods + 30
     mod_num = 20
-    progress_bar_callback(total=total, progress=0, step=7)
+    progress.items(total, 0, step=7)
 
     await smooth_step_callback('Adding Overrides to Metadata')
 
     # get mods from overrides
-    override_mods_path = overrides_path / 'mods'
-    if override_mods_path.exists():
-        for mod in override_mods_path.glob('*.jar'):
+    for mod in overrides:
+        if len(mod.parts) == 2 and mod.parts[0] == 'mods' and mod.suffix == '.jar':
             instance.mods.add_mod(ModEntry(
                     mod_id=mod.name,
                     name=mod.name,
@@ -229,21 +290,20 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
     # get datapacks from overrides
     # - some datapacks are in overrides and downloaded, example Daggers Fix in Prominence II
     # datapacks get put in config/paxi/datapacks, don't know if from overrides or downloads (can't remember if i honor the path supplied or if there is one xD)
-    for folder in overrides_path.rglob('datapacks'):
-        if folder.is_dir():
-            for datapack in folder.glob('*.zip'):
-                instance.mods.add_mod(ModEntry(
-                    mod_id=datapack.name,
-                    name=datapack.name,
-                    source=instance.modpack_source,
-                    type='datapack',
-                    filename=datapack.name,
-                    install_date=datetime.now(),
-                    from_modpack=True,
-                    is_override=True
-                ))
-
-    progress_bar_callback(total=total, progress=10, step=7)
+    for datapack in overrides:
+        if len(datapack.parts) > 1 and datapack.parts[-2] == 'datapacks' and datapack.suffix == '.zip':
+            instance.mods.add_mod(ModEntry(
+                mod_id=datapack.name,
+                name=datapack.name,
+                source=instance.modpack_source,
+                type='datapack',
+                filename=datapack.name,
+                install_date=datetime.now(),
+                from_modpack=True,
+                is_override=True
+            ))
+
+    progress.items(total, 10, step=7)
 
     if cancel_event.is_set():
         return -1, 'cancelled'
@@ -253,12 +313,16 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
     if downloads_path.exists():
         await rmtree(downloads_path)
 
-    progress_bar_callback(total=total, progress=20, step=7)
+    progress.items(total, 20, step=7)
 
     await smooth_step_callback('Adding Mods to Metadata')
     for mod in modlist:
+        # other files from the index (configs and the like) are downloaded but not tracked
+        if mod["type"] not in ('mod', 'datapack'):
+            mod_num += 1
+            continue
         instance.mods.add_mod(ModEntry(
-            mod_id=mod["project_id"],
+            mod_id=mod["project_id"] or mod["file_name"],
             slug=mod["slug"],
             name=mod["name"].lstrip(),
             version=mod["version_number"],
@@ -267,17 +331,20 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
             source=instance.modpack_source,
             type=mod["type"],
             filename=mod["file_name"],
+            sha1=(mod.get("hashes") or {}).get("sha1"),
             install_date=datetime.now(),
             from_modpack=True
         ))
         mod_num += 1
-        progress_bar_callback(total=total, progress=mod_num, step=7)
+        progress.items(total, mod_num, step=7)
     
     await smooth_step_callback('Saving Metadata')
 
     instance.save()
+    InstallJournal.delete(instance_path)
 
-    progress_bar_callback(total=total, progress=total, step=7)
+    progress.items(total, total, step=7)
+    progress.step_finished(7)
 
     return 0, 'success'
 
@@ -286,15 +353,13 @@ async def install_modpack(instance: InstanceConfig, steps: list[str], dependenci
 # 2. Installing Modloader
 # 3. Finalizing Installation
 
-async def install_modloader(instance: InstanceConfig, steps: list[str], progress_bar_callback, step_callback, cancel_event: asyncio.Event, mc_version_url: str | None = None) -> tuple[int, str]:
-    async def smooth_step_callback(step: str, label_id: int=1):
-        step_callback(step, label_id)
+async def install_modloader(instance: InstanceConfig, steps: list[str], progress: ProgressBus, cancel_event: asyncio.Event, mc_version_url: str | None = None) -> tuple[int, str]:
+    async def smooth_step_callback(text: str):
+        progress.status(text)
         await asyncio.sleep(0.1)
     
     # 1. Get Modloader installer
-    step_callback(steps[0], 0)
-    progress_bar_callback(total=100, progress=0)
-    progress_bar_callback(total=100, progress=0, bar_id=0)
+    progress.step_started(1, steps[0])
     await asyncio.sleep(0.1)
 
     await smooth_step_callback('Getting Modloader info')
@@ -302,7 +367,10 @@ async def install_modloader(instance: InstanceConfig, steps: list[str], progress
     loader_version = instance.modloader_version
     instance_path = instance.path
     instance_path.mkdir(parents=True, exist_ok=True)
-    progress_bar_callback(total=100, progress=50)
+    journal = InstallJournal.load(instance_path)
+    if journal is None or not journal.matches(instance, 'modloader'):
+        journal = InstallJournal.new(instance, 'modloader')
+    progress.items(100, 50, step=1)
     await asyncio.sleep(0.1)
 
     await smooth_step_callback(f'Checking for {instance.formatted_modloader()} installer')
@@ -310,48 +378,40 @@ async def install_modloader(instance: InstanceConfig, steps: list[str], progress
     installer_jar = await get_server_installer(instance)
     if installer_jar is None or isinstance(installer_jar, Exception):
         return 1, 'Could not get installer'
-    progress_bar_callback(total=100, progress=100)
-    progress_bar_callback(total=100, progress=33, bar_id=0)
+    progress.items(100, 100, step=1)
     await asyncio.sleep(0.1)
 
     if cancel_event.is_set():
         return -1, 'cancelled'
+    progress.step_finished(1)
 
     # 2. Install Modloader
-    step_callback(steps[1], 0)
-    await smooth_step_callback(f'Running {instance.formatted_modloader()} installer')
-    # - untested, should work
-    result = await install_server(Path("instances") / instance.instance_id, installer_jar, instance.modloader, mc_version, loader_version, mc_version_url)
+    progress.step_started(2, steps[1])
+    if journal.is_step_done(2):
+        await smooth_step_callback(f'{instance.formatted_modloader()} already installed')
+    else:
+        await smooth_step_callback(f'Running {instance.formatted_modloader()} installer')
+        # - untested, should work
+        result = await install_server_from_template(Path("instances") / instance.instance_id, installer_jar, instance.modloader, mc_version, loader_version, mc_version_url, progress, 2, cancel_event)
 
-    if result != 0 or isinstance(result, Exception):
-        return 2, str(result)
-    progress_bar_callback(total=100, progress=100)
-    progress_bar_callback(total=100, progress=66, bar_id=0)
+        if cancel_event.is_set():
+            return -1, 'cancelled'
+        if result != 0 or isinstance(result, Exception):
+            return 2, str(result)
+        journal.complete_step(2, instance_path)
+    progress.items(100, 100, step=2)
     await asyncio.sleep(0.1)
+    progress.step_finished(2)
 
     # 3. Finalize Installation
+    progress.step_started(3, steps[2])
     instance.save()
+    InstallJournal.delete(instance_path)
+    progress.step_finished(3)
     # - what else even is there to do?
 
     return 0, 'success'
 
-async def async_extract_zip(zip_path: Path, extract_to: Path, progress_cb=None, item_cb=None, step=None, cancel_event=None):
-    loop = asyncio.get_running_loop()
-    await loop.run_in_executor(None, _extract_zip_sync, zip_path, extract_to, progress_cb, item_cb, step, cancel_event)
-
-def _extract_zip_sync(zip_path: Path, extract_to: Path, progress_cb=None, item_cb=None, step=None, cancel_event=None):
-    with zipfile.ZipFile(zip_path, 'r') as z:
-        members = z.namelist()
-        total = len(members)
-        for i, member in enumerate(members, start=1):
-            if cancel_event and cancel_event.is_set():
-                return
-            z.extract(member, extract_to)
-            if progress_cb and step:
-                progress_cb(total, i, step=step)
-            if item_cb:
-                item_cb(f'Extracting: {member}')
-
 async def combine_project_and_version_info(
     projects: dict[str, dict],
     versions: list[dict]
@@ -371,60 +431,168 @@ async def combine_project_and_version_info(
             "date_published": version.get("date_published"),
             "file_name": version["files"][0]["filename"] if version.get("files") else None,
             "download_url": version["files"][0]["url"] if version.get("files") else None,
+            "file_size": version["files"][0].get("size") if version.get("files") else None,
+            "hashes": version["files"][0].get("hashes") if version.get("files") else None,
             "loaders": project.get("loaders"),
             "type": 'datapack' if 'datapack' in project.get("loaders", []) else 'mod'
         })
     return combined
 
-async def copytree_with_progress(
-    src: Path,
-    dst: Path,
-    dirs_exist_ok: bool = False,
-    progress_cb=None,
-    step_cb=None,
-    step=None
-):
-    # Count total files for progress
-    total = sum(len(files) for _, _, files in os.walk(src))
-    done = 0
-
-    for root, dirs, files in os.walk(src):
-        rel_path = Path(root).relative_to(src)
-        target_dir = dst / rel_path
-        target_dir.mkdir(parents=True, exist_ok=dirs_exist_ok)
-        # - copy all datapacks to the datapacks path (for if it's just overrides/datapacks so it goes to world/datapacks)
-        for file in files:
-            src_file = Path(root) / file
-            dst_file = target_dir / file
-            if step_cb:
-                step_cb(f"Copying {src_file.relative_to(src)}")
-            try:
-                await copy2(src_file, dst_file)
-            except Exception as e:
-                if step_cb:
-                    # - log errors somehow?
-                    step_cb(f"Failed to copy {src_file}: {e}")
-                continue
-
-            done += 1
-            if progress_cb and step:
-                progress_cb(total=total, progress=done, step=step)
-
-async def get_modloader_version(source: str, extract_path: Path) -> str | None:
+async def get_modloader_version(source: str, manifest: dict | None) -> str | None:
+    manifest = manifest or {}
     match source:
         case 'modrinth':
-            with open(extract_path / 'modrinth.index.json', 'r', encoding='utf-8') as f:
-                return next((version for key, version in json.load(f)["dependencies"].items() if key.lower() != "minecraft"), None)
+            return next((version for key, version in manifest.get("dependencies", {}).items() if key.lower() != "minecraft"), None)
         # - if api has info, remove
         case "curseforge":
             # CurseForge packs → manifest.json
-            with (extract_path / "manifest.json").open("r", encoding="utf-8") as f:
-                manifest = json.load(f)
-                loaders = manifest.get("minecraft", {}).get("modLoaders", [])
-                for loader in loaders:
-                    if loader.get("primary"):  # primary loader is the one you want
-                        loader_id = loader["id"]  # e.g. "fabric-0.16.14"
-                        return loader_id.split("-", 1)[1] if "-" in loader_id else loader_id
+            loaders = manifest.get("minecraft", {}).get("modLoaders", [])
+            for loader in loaders:
+                if loader.get("primary"):  # primary loader is the one you want
+                    loader_id = loader["id"]  # e.g. "fabric-0.16.14"
+                    return loader_id.split("-", 1)[1] if "-" in loader_id else loader_id
+
+# project and version id in modrinth cdn urls, https://cdn.modrinth.com/data/<project_id>/versions/<version_id>/<file>
+MODRINTH_CDN_IDS = re.compile(r"/data/(?P<project_id>[\w]+)/versions/(?P<version_id>[\w]+)/")
+
+async def get_index_modlist(source: str, manifest: dict | None) -> list[dict] | None:
+    """
+    Build the modlist straight from the modpack index, without any api requests.
+
+    Files the index marks as unsupported on servers and files with paths outside the instance are skipped. Only what the index knows is filled in,
+    names are the file names, the rest of the metadata is resolved after the install (see `resolve_modlist_metadata`).
+
+    Returns:
+        list[dict] | None: Modlist entries like `combine_project_and_version_info`'s plus the file's `path`, `None` if the pack has no index.
+    """
+    if source != 'modrinth' or manifest is None:
+        return None
+    files = manifest.get("files", [])
+
+    modlist = []
+    for file in files:
+        if file.get("env", {}).get("server") == "unsupported" or not file.get("downloads"):
+            continue
+        # a broken or malicious pack could point files outside the instance
+        relative = instance_relative_path(file.get("path") or '')
+        if relative is None:
+            continue
+        path = Path(relative)
+        ids = MODRINTH_CDN_IDS.search(file["downloads"][0])
+        if 'datapacks' in path.parts[:-1]:
+            type = 'datapack'
+        elif path.parts[0] == 'mods' and path.suffix == '.jar':
+            type = 'mod'
+        else:
+            type = 'file'
+        modlist.append({
+            "project_id": ids["project_id"] if ids else None,
+            "version_id": ids["version_id"] if ids else None,
+            "slug": None,
+            "name": path.stem,
+            "description": None,
+            "version_number": None,
+            "date_published": None,
+            "file_name": path.name,
+            "path": relative.as_posix(),
+            "download_url": file["downloads"][0],
+            "file_size": file.get("fileSize"),
+            "hashes": file.get("hashes"),
+            "loaders": None,
+            "type": type
+        })
+    return modlist
+
+async def resolve_modlist_metadata(instance_path: Path) -> int:
+    """
+    Fill in names, slugs and versions of modpack mods installed from the index, looked up by file hash.
+
+    Meant to run in the background once the install is done, it's two batched requests for the whole modlist.
+    The mod list is reloaded from disk and saved again.
+
+    Returns:
+        int: Number of mods that got their metadata.
+    """
+    instance = InstanceConfig.load(instance_path)
+    pending = {mod.sha1: mod for mod in instance.mods.mods if mod.sha1 and not mod.slug and not mod.is_override}
+    if not pending:
+        return 0
+
+    # - make source agnostic
+    api = modrinth.ModrinthAPI()
+    with modrinth.request_priority(PRIORITY_BACKGROUND):
+        versions = await api.fetch_versions_by_hash(list(pending))
+        if not versions:
+            return 0
+        try:
+            projects = await api.fetch_projects(list({version["project_id"] for version in versions.values()}), filter_server_side=False)
+        except (modrinth.RateLimitError, modrinth.IncompleteResultError):
+            return 0
+
+    resolved = 0
+    for sha1, version in versions.items():
+        mod = pending.get(sha1)
+        project = projects.get(version["project_id"])
+        if not mod or not project:
+            continue
+        if mod.mod_id != version["project_id"] and instance.mods.has_mod(version["project_id"]):
+            continue
+        mod.mod_id = version["project_id"]
+        mod.version_id = version["id"]
+        mod.slug = project.get("slug")
+        mod.name = (project.get("title") or mod.name).lstrip()
+        mod.version = version.get("version_number")
+        if version.get("date_published"):
+            mod.release_date = datetime.fromisoformat(version["date_published"])
+        resolved += 1
+
+    if resolved:
+        instance.mods.save(instance_path / 'mods')
+    return resolved
+
+async def get_index_mirrors(source: str, manifest: dict | None) -> dict[str, list[str]]:
+    """Get download urls listed in the modpack index, mapped by the sha1 of the file."""
+    match source:
+        case 'modrinth':
+            files = (manifest or {}).get("files", [])
+            return {file["hashes"]["sha1"]: file.get("downloads", []) for file in files if file.get("hashes", {}).get("sha1")}
+    return {}
+
+class InstallerOutput:
+    """
+    Turns the output of a modloader installer into short status updates, passed to `status_cb(text)`.
+
+    Forge and NeoForge print every library they check or download and every processor they run,
+    Fabric and Quilt print a line per download.
+    """
+    LIBRARY = re.compile(r"^(?:Considering|Checking) library (?P<name>\S+)")
+    DOWNLOAD = re.compile(r"^Downloading (?:library )?(?:from )?(?P<url>https?://\S+)")
+    PROCESSOR = re.compile(r"^\s*MainClass: (?P<name>\S+)")
+    TASK = re.compile(r"^\s*Args: --task, (?P<task>\w+)")
+
+    def __init__(self, status_cb):
+        self.status_cb = status_cb
+        self.libraries = 0
+        self.processors = 0
+
+    def __call__(self, line: str):
+        if status := self.parse(line):
+            self.status_cb(status)
+
+    def parse(self, line: str) -> str | None:
+        if match := self.LIBRARY.match(line):
+            self.libraries += 1
+            return f"Checking library {self.libraries}: {match['name']}"
+        if match := self.DOWNLOAD.match(line):
+            return f"Downloading {match['url'].rsplit('/', 1)[-1]}"
+        if match := self.PROCESSOR.match(line):
+            self.processors += 1
+            return f"Running processor {self.processors}: {match['name'].rsplit('.', 1)[-1]}"
+        if match := self.TASK.match(line):
+            return f"Running processor {self.processors}: {match['task']}"
+        if line.startswith(("Downloading", "Installing", "Extracting", "Building")):
+            return line.strip().rstrip('.:')
+        return None
 
 async def get_server_installer(instance: InstanceConfig):
     try:
@@ -440,20 +608,59 @@ async def get_server_installer(instance: InstanceConfig):
     except Exception as e:
         return e
 
-async def install_server(install_dir: Path, installer_path: Path, modloader: str, mc_version: str, loader_version: str | None, mc_version_url: str | None):
+async def install_server_from_template(install_dir: Path, installer_path: Path, modloader: str, mc_version: str, loader_version: str | None, mc_version_url: str | None, progress: ProgressBus, step: int, cancel_event: asyncio.Event, limits: list[TokenBucket] | None = None):
+    """
+    Install the modloader server files into `install_dir`, from the template of an earlier install of the same
+    modloader, Minecraft and loader version if there is one.
+
+    Without a template the installer runs into a new template first, which is then copied into `install_dir`.
+    If the template can't be copied completely, it's removed and the installer runs into `install_dir` instead.
+    Returns the same as `install_server`.
+    """
+    template = await asyncio.to_thread(modloader_templates.get, modloader, mc_version, loader_version, installer_path) if loader_version else None
+    if template is None:
+        if not modloader_templates.enabled or not loader_version:
+            return await install_server(install_dir, installer_path, modloader, mc_version, loader_version, mc_version_url, InstallerOutput(progress.status), cancel_event)
+        staging = modloader_templates.staging()
+        result = await install_server(staging, installer_path, modloader, mc_version, loader_version, mc_version_url, InstallerOutput(progress.status), cancel_event)
+        if result != 0 or isinstance(result, Exception) or cancel_event.is_set():
+            await rmtree(staging, ignore_errors=True)
+            return result
+        template = await asyncio.to_thread(modloader_templates.add, modloader, mc_version, loader_version, installer_path, staging)
+    else:
+        progress.status(f'Using installed {modloader} {loader_version} for Minecraft {mc_version}')
+
+    try:
+        await materialize_template(template, install_dir, progress.bytes, None, step, cancel_event, limits)
+    except OSError:
+        # the template is broken or unreadable, build it again next time and install this one the slow way
+        await asyncio.to_thread(modloader_templates.remove, modloader, mc_version, str(loader_version))
+        progress.status(f'Could not use installed {modloader} {loader_version}, running the installer')
+        return await install_server(install_dir, installer_path, modloader, mc_version, loader_version, mc_version_url, InstallerOutput(progress.status), cancel_event)
+    return 0
+
+async def install_server(install_dir: Path, installer_path: Path, modloader: str, mc_version: str, loader_version: str | None, mc_version_url: str | None, line_cb=None, cancel_event: asyncio.Event | None = None):
     try:
         match modloader:
             case 'fabric':
-                return await run_fabric_installer(install_dir, installer_path, mc_version, loader_version)
+                if loader_version:
+                    # meta serves a ready made launcher, the installer only runs if that fails
+                    try:
+                        if line_cb:
+                            line_cb('Downloading Fabric server launcher')
+                        return await install_fabric_server(install_dir, mc_version, loader_version, get_installer_version(installer_path), mc_version_url)
+                    except Exception:
+                        pass
+                return await run_fabric_installer(install_dir, installer_path, mc_version, loader_version, line_cb, cancel_event)
             case 'forge':
                 if mc_version_url is None:
                     return -1
-                return await run_forge_installer(install_dir, installer_path, mc_version_url)
+                return await run_forge_installer(install_dir, installer_path, mc_version_url, line_cb, cancel_event)
             case 'neoforge':
                 if mc_version_url is None:
                     return -1
-                return await run_neoforge_installer(install_dir, installer_path, mc_version_url)
+                return await run_neoforge_installer(install_dir, installer_path, mc_version_url, line_cb, cancel_event)
             case 'quilt':
-                return await run_quilt_installer(install_dir, installer_path, mc_version, str(loader_version))
+                return await run_quilt_installer(install_dir, installer_path, mc_version, str(loader_version), line_cb, cancel_event)
     except Exception as e:
         return e
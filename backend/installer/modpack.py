@@ -0,0 +1,196 @@
+import asyncio, json, os, shutil, threading, zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath, PureWindowsPath
+
+from helpers import TokenBucket, disk_write_limiter
+from config import EXTRACT_WORKERS, EXTRACT_PARALLEL_MIN
+
+# index file of each modpack format, at the root of the modpack zip
+MANIFEST_FILES = {
+    "modrinth": "modrinth.index.json",
+    "curseforge": "manifest.json",
+}
+
+# folders in the overrides that are client only and never copied to a server
+CLIENT_ONLY_OVERRIDES = ("resourcepacks", "shaderpacks")
+
+def read_manifest(source: str, modpack_path: Path) -> dict | None:
+    """
+    Read the index of a modpack straight out of its zip, without extracting anything.
+
+    Returns:
+        dict | None: The parsed index, `None` if the source has no index or the pack doesn't contain it.
+    """
+    name = MANIFEST_FILES.get(source)
+    if name is None:
+        return None
+    with zipfile.ZipFile(modpack_path) as z:
+        try:
+            return json.loads(z.read(name))
+        except KeyError:
+            return None
+
+async def async_read_manifest(source: str, modpack_path: Path) -> dict | None:
+    return await asyncio.to_thread(read_manifest, source, modpack_path)
+
+def override_folders(source: str, manifest: dict | None) -> list[str]:
+    """Get the folders of a modpack that are copied into the instance, later ones take precedence."""
+    match source:
+        case "modrinth":
+            # server-overrides replace files of the common overrides on servers
+            return ["overrides", "server-overrides"]
+        case "curseforge":
+            return [(manifest or {}).get("overrides") or "overrides"]
+    return ["overrides"]
+
+def instance_relative_path(path: str) -> PurePosixPath | None:
+    """
+    Check a path from a modpack that is meant to be relative to the instance.
+
+    Returns:
+        PurePosixPath | None: The path, `None` if it's empty, absolute (also as a windows path) or contains '..',
+        those would write outside the instance.
+    """
+    relative = PurePosixPath(path)
+    windows = PureWindowsPath(path)
+    if not relative.parts or relative.is_absolute() or windows.drive or windows.root or '..' in relative.parts or '..' in windows.parts:
+        return None
+    return relative
+
+def override_members(z: zipfile.ZipFile, folders: list[str]) -> dict[PurePosixPath, zipfile.ZipInfo]:
+    """
+    Get the zip members to extract into the instance, mapped by their path relative to the instance.
+
+    Client only folders and paths escaping the instance are left out, so they are never written.
+    """
+    members: dict[PurePosixPath, zipfile.ZipInfo] = {}
+    for folder in folders:
+        for info in z.infolist():
+            if info.is_dir():
+                continue
+            parts = PurePosixPath(info.filename).parts
+            if len(parts) < 2 or parts[0] != folder:
+                continue
+            relative = instance_relative_path(PurePosixPath(*parts[1:]).as_posix())
+            if relative is None or relative.parts[0] in CLIENT_ONLY_OVERRIDES:
+                continue
+            # a later folder overrides the file instead of writing it twice
+            members.pop(relative, None)
+            members[relative] = info
+    return members
+
+async def async_extract_overrides(
+    modpack_path: Path,
+    dest: Path,
+    folders: list[str],
+    progress_cb=None,
+    item_cb=None,
+    step=None,
+    cancel_event: asyncio.Event | threading.Event | None = None,
+    limits: list[TokenBucket] | None = None,
+    workers: int = EXTRACT_WORKERS,
+    skip=None,
+    file_cb=None
+) -> list[PurePosixPath]:
+    """
+    Stream the overrides of a modpack straight from the zip to their place in the instance.
+
+    Large packs are extracted by a pool of threads, each with its own handle on the zip, decompressing
+    and writing release the GIL. Progress is reported in uncompressed bytes over all threads.
+    Members for which `skip(relative, info)` is true count as extracted without being written,
+    `file_cb(relative, size)` is called from the extracting thread for every written file.
+
+    Returns:
+        list[PurePosixPath]: Paths of the extracted files, relative to `dest`.
+    """
+    return await asyncio.to_thread(_extract_overrides_sync, modpack_path, dest, folders, progress_cb, item_cb, step, cancel_event, limits, workers, skip, file_cb)
+
+def extract_worker_count(members: int, workers: int = EXTRACT_WORKERS) -> int:
+    """Get the number of threads to extract `members` files with."""
+    if members < EXTRACT_PARALLEL_MIN:
+        return 1
+    return max(1, min(workers or min(8, os.cpu_count() or 1), members))
+
+def _extract_overrides_sync(modpack_path: Path, dest: Path, folders: list[str], progress_cb=None, item_cb=None, step=None, cancel_event=None, limits=None, workers: int = EXTRACT_WORKERS, skip=None, file_cb=None) -> list[PurePosixPath]:
+    with zipfile.ZipFile(modpack_path) as z:
+        members = override_members(z, folders)
+    skipped = {relative for relative, info in members.items() if skip and skip(relative, info)}
+    pending = {relative: info for relative, info in members.items() if relative not in skipped}
+    done = sum(members[relative].file_size for relative in skipped)
+    total = done + sum(info.file_size for info in pending.values())
+
+    def progress(_, extracted: int, step=None):
+        progress_cb(total, done + extracted, step=step)
+
+    extracted = skipped | set(extract_members(modpack_path, dest, pending, progress if progress_cb else None, item_cb, step, cancel_event, limits, workers, file_cb))
+    return [relative for relative in members if relative in extracted]
+
+def extract_members(
+    modpack_path: Path,
+    dest: Path,
+    members: dict[PurePosixPath, zipfile.ZipInfo],
+    progress_cb=None,
+    item_cb=None,
+    step=None,
+    cancel_event: asyncio.Event | threading.Event | None = None,
+    limits: list[TokenBucket] | None = None,
+    workers: int = EXTRACT_WORKERS,
+    file_cb=None
+) -> list[PurePosixPath]:
+    """
+    Extract zip members to their path relative to `dest`, blocking.
+
+    The first error stops all threads and is raised, a cancelled extraction returns what was extracted so far.
+
+    Returns:
+        list[PurePosixPath]: Paths of the extracted files, in the order of `members`.
+    """
+    targets = {relative: dest.joinpath(*relative.parts) for relative in members}
+    # directories are created once upfront, not checked again for every file
+    for folder in sorted({target.parent for target in targets.values()}):
+        folder.mkdir(parents=True, exist_ok=True)
+
+    # largest first, so a big file doesn't end up alone at the end
+    queue = deque(sorted(members.items(), key=lambda item: item[1].file_size, reverse=True))
+    total = sum(info.file_size for info in members.values())
+    done = 0
+    extracted: set[PurePosixPath] = set()
+    lock = threading.Lock()
+    failed = threading.Event()
+
+    def worker():
+        nonlocal done
+        try:
+            with zipfile.ZipFile(modpack_path) as z:
+                while not failed.is_set() and not (cancel_event and cancel_event.is_set()):
+                    try:
+                        relative, info = queue.popleft()
+                    except IndexError:
+                        return
+                    if item_cb:
+                        item_cb(f'Extracting: {relative}')
+                    for bucket in [disk_write_limiter, *(limits or [])]:
+                        bucket.consume_blocking(info.file_size)
+                    with z.open(info) as src, open(targets[relative], 'wb') as dst:
+                        shutil.copyfileobj(src, dst)
+                    if file_cb:
+                        file_cb(relative, info.file_size)
+                    with lock:
+                        extracted.add(relative)
+                        done += info.file_size
+                        if progress_cb and step:
+                            progress_cb(total, done, step=step)
+        except BaseException:
+            failed.set()
+            raise
+
+    count = extract_worker_count(len(members), workers)
+    if count == 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(count, thread_name_prefix='extract') as pool:
+            futures = [pool.submit(worker) for _ in range(count)]
+        for future in futures:
+            future.result()
+    return [relative for relative in members if relative in extracted]
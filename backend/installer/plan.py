@@ -0,0 +1,150 @@
+import asyncio, os, zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from backend.installer.modpack import override_folders, override_members, instance_relative_path
+from backend.storage import InstanceConfig
+from config import DISK_SPACE_MARGIN
+
+# rough size of a freshly installed server per modloader (server jar, libraries), the installers don't tell upfront
+MODLOADER_SIZE_ESTIMATE = {
+    "fabric": 80 * 1024**2,
+    "quilt": 80 * 1024**2,
+    "forge": 250 * 1024**2,
+    "neoforge": 250 * 1024**2,
+}
+
+@dataclass
+class PlannedFile:
+    dest: Path
+    size: int
+    hashes: dict[str, str] = field(default_factory=dict)
+    urls: list[str] = field(default_factory=list)
+
+@dataclass
+class InstallPlan:
+    """Every file an install will write, grouped by install step, known before writing them."""
+    steps: dict[int, list[PlannedFile]] = field(default_factory=dict)
+
+    def add(self, step: int, file: PlannedFile):
+        self.steps.setdefault(step, []).append(file)
+
+    def step_bytes(self, step: int) -> int:
+        return sum(file.size for file in self.steps.get(step, []))
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self.step_bytes(step) for step in self.steps)
+
+    def step_weights(self, step_count: int, min_weight: int = 2) -> list[int]:
+        """
+        Share of the overall progress per step (index 0 unused, sums to 100), weighted by bytes.
+        Steps that write little still get `min_weight`, so they are visible.
+        """
+        total = self.total_bytes or 1
+        raw = [0.0] + [max(min_weight, 100 * self.step_bytes(step) / total) for step in range(1, step_count + 1)]
+        scale = 100 / sum(raw)
+        weights = [round(weight * scale) for weight in raw]
+        weights[-1] += 100 - sum(weights) # rounding leftovers
+        return weights
+
+    def missing_space(self, margin: int = DISK_SPACE_MARGIN) -> dict[Path, tuple[int, int]]:
+        """
+        Check the plan against the free space of the filesystems it writes to.
+
+        Files that already exist only count with the bytes they still grow by.
+
+        Returns:
+            dict[Path, tuple[int, int]]: Mount point -> (needed, free) bytes for every filesystem that's too small.
+        """
+        needed: dict[int, int] = {}
+        mount: dict[int, Path] = {}
+        for files in self.steps.values():
+            for file in files:
+                existing = _existing_parent(file.dest.parent)
+                device = existing.stat().st_dev
+                mount.setdefault(device, existing)
+                present = file.dest.stat().st_size if file.dest.is_file() else 0
+                needed[device] = needed.get(device, 0) + max(0, file.size - present)
+
+        missing = {}
+        for device, size in needed.items():
+            free = free_space(mount[device])
+            if size + margin > free:
+                missing[mount[device]] = (size + margin, free)
+        return missing
+
+    def check_disk_space(self, margin: int = DISK_SPACE_MARGIN) -> str | None:
+        """Get an error message if the plan doesn't fit on disk, `None` if it does."""
+        missing = self.missing_space(margin)
+        if not missing:
+            return None
+        return ', '.join(
+            f"Not enough disk space at '{path}': need {format_size(need)}, {format_size(free)} free"
+            for path, (need, free) in missing.items()
+        )
+
+def free_space(path: Path) -> int:
+    """Get the bytes available to unprivileged users on the filesystem of `path`."""
+    stat = os.statvfs(_existing_parent(path))
+    return stat.f_bavail * stat.f_frsize
+
+def format_size(size: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+def _existing_parent(path: Path) -> Path:
+    path = path.absolute()
+    while not path.exists():
+        path = path.parent
+    return path
+
+def plan_modpack_download(instance: InstanceConfig, modpack_path: Path, modpack_file: dict | None) -> InstallPlan:
+    """Plan what is known before the modpack is downloaded, the modpack file and the modloader install."""
+    plan = InstallPlan()
+    plan.add(1, PlannedFile(modpack_path, (modpack_file or {}).get("size") or 0, (modpack_file or {}).get("hashes") or {}))
+    plan.add(3, PlannedFile(instance.path, MODLOADER_SIZE_ESTIMATE.get(instance.modloader, 0)))
+    return plan
+
+async def plan_modpack_install(instance: InstanceConfig, modpack_path: Path, manifest: dict | None, modpack_file: dict | None = None, modlist: list[dict] | None = None) -> InstallPlan:
+    """
+    Plan a whole modpack install from the downloaded modpack, without extracting it.
+
+    Sizes of the overrides come from the zip's central directory, the mods with their sizes,
+    hashes and urls from the modpack index (`manifest`). Packs without an index fall back
+    to the file metadata in `modlist`.
+    """
+    return await asyncio.to_thread(_plan_modpack_install, instance, modpack_path, manifest, modpack_file, modlist)
+
+def _plan_modpack_install(instance: InstanceConfig, modpack_path: Path, manifest: dict | None, modpack_file: dict | None, modlist: list[dict] | None) -> InstallPlan:
+    plan = plan_modpack_download(instance, modpack_path, modpack_file)
+    with zipfile.ZipFile(modpack_path) as z:
+        for relative, info in override_members(z, override_folders(instance.modpack_source, manifest)).items():
+            plan.add(4, PlannedFile(instance.path.joinpath(*relative.parts), info.file_size))
+
+    if instance.modpack_source == 'modrinth':
+        for file in (manifest or {}).get("files", []):
+            relative = instance_relative_path(file.get("path") or '')
+            # skipped by the install too, see get_index_modlist
+            if file.get("env", {}).get("server") == "unsupported" or relative is None:
+                continue
+            plan.add(6, PlannedFile(
+                instance.path.joinpath(*relative.parts),
+                file.get("fileSize", 0),
+                file.get("hashes", {}),
+                file.get("downloads", []),
+            ))
+
+    if not plan.steps.get(6):
+        for entry in modlist or []:
+            folder = Path('mods') if entry.get("type") == 'mod' else Path('world') / 'datapacks'
+            plan.add(6, PlannedFile(
+                instance.path / folder / str(entry.get("file_name")),
+                entry.get("file_size") or 0,
+                entry.get("hashes") or {},
+                [entry["download_url"]] if entry.get("download_url") else [],
+            ))
+    return plan
@@ -0,0 +1,101 @@
+import asyncio, json, os, shutil, tempfile
+from pathlib import Path
+
+from helpers import async_copy_tree, TokenBucket
+from config import MODLOADER_TEMPLATES_ENABLED, MODLOADER_TEMPLATES_DIR
+
+class ModloaderTemplates:
+    """
+    Server trees left by modloader installers, kept to create new instances without running the installer again.
+
+    Templates are keyed by (modloader, Minecraft version, loader version) and stored as
+    `<root>/<modloader>/<mc version>/<loader version>/server`, next to a `template.json` naming
+    the installer they were built with. A template built by a different installer is rebuilt.
+    """
+    def __init__(self, root: Path, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+
+    def path_for(self, modloader: str, mc_version: str, loader_version: str) -> Path:
+        return self.root / modloader / mc_version / loader_version
+
+    def get(self, modloader: str, mc_version: str, loader_version: str | None, installer: Path) -> Path | None:
+        """Get the server tree of a template built with `installer`, `None` if there is none."""
+        if not self.enabled or not loader_version:
+            return None
+        folder = self.path_for(modloader, mc_version, loader_version)
+        try:
+            info = json.loads((folder / 'template.json').read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+        if info.get("installer") != installer_id(installer) or not (folder / 'server').is_dir():
+            return None
+        return folder / 'server'
+
+    def staging(self) -> Path:
+        """Get an empty folder to run an installer into, on the same filesystem as the templates."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        return Path(tempfile.mkdtemp(prefix='.staging-', dir=self.root))
+
+    def add(self, modloader: str, mc_version: str, loader_version: str, installer: Path, staging: Path) -> Path:
+        """
+        Turn a staging folder an installer ran into into the template for its key, replacing an outdated one.
+
+        Returns:
+            Path: The server tree of the template.
+        """
+        folder = self.path_for(modloader, mc_version, loader_version)
+        if folder.exists():
+            shutil.rmtree(folder, ignore_errors=True)
+        folder.mkdir(parents=True, exist_ok=True)
+        # renamed in one step, a half built template is never used
+        os.replace(staging, folder / 'server')
+        (folder / 'template.json').write_text(json.dumps({"installer": installer_id(installer)}, indent=4), encoding='utf-8')
+        return folder / 'server'
+
+    def remove(self, modloader: str, mc_version: str, loader_version: str):
+        """Remove the template of a key, so the next install builds it again."""
+        shutil.rmtree(self.path_for(modloader, mc_version, loader_version), ignore_errors=True)
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+def installer_id(installer: Path) -> str:
+    """Identify an installer jar by its name and size, a new installer version gets a new template."""
+    return f"{installer.name}:{installer.stat().st_size}"
+
+def is_immutable(relative: Path) -> bool:
+    """Check if a template file is never written to by a server, those are hardlinked into instances instead of copied."""
+    return relative.suffix == '.jar'
+
+async def materialize_template(template: Path, dest: Path, progress_cb=None, item_cb=None, step=None, cancel_event=None, limits: list[TokenBucket] | None = None) -> list[Path]:
+    """
+    Create the server files of an instance from a template.
+
+    Jars are hardlinked, the rest (scripts, jvm args, properties) is reflinked or copied,
+    so editing them in an instance doesn't change the template.
+
+    Raises:
+        OSError: If a file could not be copied, the files already copied into `dest` are removed again.
+    """
+    try:
+        return await async_copy_tree(template, dest, True, progress_cb, item_cb, step, cancel_event, limits, hardlink=is_immutable)
+    except OSError:
+        # a server tree with missing files must not pass as installed
+        await asyncio.to_thread(remove_template_files, template, dest)
+        raise
+
+def remove_template_files(template: Path, dest: Path):
+    """Remove the files and then empty folders of a template from `dest`, leaving the rest of the instance alone."""
+    paths = sorted(template.rglob('*'), key=lambda path: len(path.parts), reverse=True)
+    for path in paths:
+        target = dest / path.relative_to(template)
+        try:
+            if target.is_dir() and not target.is_symlink():
+                target.rmdir() # only if empty
+            else:
+                target.unlink(missing_ok=True)
+        except OSError:
+            pass
+
+modloader_templates = ModloaderTemplates(Path(MODLOADER_TEMPLATES_DIR), MODLOADER_TEMPLATES_ENABLED)
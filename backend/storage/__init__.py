@@ -7,10 +7,12 @@ __all__ = [
     "InstanceConfig",
     "InstanceSummary",
     "InstanceRegistry",
+    "InstallJournal",
 ]
 
 if TYPE_CHECKING:
     from .instance import ModEntry, ModList, InstanceConfig, InstanceSummary, InstanceRegistry
+    from .journal import InstallJournal
 
 # Map attribute names to their modules
 _lazy_map = {
@@ -19,6 +21,7 @@ _lazy_map = {
     "InstanceConfig": ".instance",
     "InstanceSummary": ".instance",
     "InstanceRegistry": ".instance",
+    "InstallJournal": ".journal",
 
 }
 
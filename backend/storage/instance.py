@@ -19,6 +19,7 @@ class ModEntry(BaseModel):
     source: str # "modrinth", "curseforge", "local"
     type: Literal["mod", "datapack"]
     filename: str
+    sha1: Optional[str] = None # hash of the file, to look up metadata by
     enabled: bool = True
     install_date: datetime
     from_modpack: bool = False
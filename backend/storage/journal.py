@@ -0,0 +1,110 @@
+import os, threading, time
+from pathlib import Path
+from pydantic import BaseModel, PrivateAttr
+from typing import Dict, List, Optional, Literal, ClassVar, TYPE_CHECKING
+
+from helpers import ModloaderType
+from config import INSTALL_JOURNAL_SAVE_INTERVAL
+
+if TYPE_CHECKING:
+    from .instance import InstanceConfig
+
+# ----------------------------
+# Progress of an unfinished install
+# ----------------------------
+class InstallJournal(BaseModel):
+    """
+    Completed steps and files of an install, saved in the instance folder while it's installing.
+
+    A retry or a restart after a crash resumes at the first unit of work not in the journal.
+    The journal is deleted once the install finished.
+    """
+    FILENAME: ClassVar = 'install_journal.json'
+
+    mode: Literal["modpack", "modloader"]
+    minecraft_version: str
+    modloader: ModloaderType
+    modloader_version: Optional[str] = None
+    modpack_url: Optional[str] = None
+    modpack_version: Optional[str] = None
+    completed_steps: List[int] = []
+    completed_files: Dict[str, int] = {} # path relative to the instance -> size
+
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _last_save: float = PrivateAttr(default=0.0)
+
+    @classmethod
+    def new(cls, instance: "InstanceConfig", mode: Literal["modpack", "modloader"]) -> "InstallJournal":
+        """Start an empty journal for installing `instance`."""
+        return cls(
+            mode=mode,
+            minecraft_version=instance.minecraft_version,
+            modloader=instance.modloader,
+            modloader_version=instance.modloader_version,
+            modpack_url=instance.modpack_url,
+            modpack_version=instance.modpack_version,
+        )
+
+    @classmethod
+    def load(cls, folder: Path) -> Optional["InstallJournal"]:
+        """Load the journal of an instance folder, `None` if there is none or it's unreadable."""
+        path = folder / cls.FILENAME
+        try:
+            return cls.model_validate_json(path.read_text(encoding='utf-8'))
+        except (OSError, ValueError):
+            return None
+
+    @classmethod
+    def delete(cls, folder: Path):
+        """Delete the journal of an instance folder."""
+        (folder / cls.FILENAME).unlink(missing_ok=True)
+
+    def matches(self, instance: "InstanceConfig", mode: Literal["modpack", "modloader"]) -> bool:
+        """Check if the journal belongs to the same install of `instance`, so it can be resumed."""
+        if (self.mode, self.minecraft_version, self.modloader) != (mode, instance.minecraft_version, instance.modloader):
+            return False
+        if mode == 'modpack':
+            return (self.modpack_url, self.modpack_version) == (instance.modpack_url, instance.modpack_version)
+        return self.modloader_version == instance.modloader_version
+
+    def save(self, folder: Path):
+        """Save the journal, replacing the previous one in a single step."""
+        folder.mkdir(parents=True, exist_ok=True)
+        path = folder / self.FILENAME
+        temp = path.with_name(path.name + '.tmp')
+        # files are completed from several threads at once
+        with self._lock:
+            temp.write_text(self.model_dump_json(indent=4), encoding='utf-8')
+            os.replace(temp, path)
+            self._last_save = time.monotonic()
+
+    def checkpoint(self, folder: Path):
+        """Save the journal if the last save is older than `INSTALL_JOURNAL_SAVE_INTERVAL`."""
+        if time.monotonic() - self._last_save >= INSTALL_JOURNAL_SAVE_INTERVAL:
+            self.save(folder)
+
+    def is_step_done(self, step: int) -> bool:
+        return step in self.completed_steps
+
+    def complete_step(self, step: int, folder: Path):
+        """Mark a step as done and save right away."""
+        with self._lock:
+            if step not in self.completed_steps:
+                self.completed_steps.append(step)
+        self.save(folder)
+
+    def has_file(self, relative: str, folder: Path) -> bool:
+        """Check if a file was completed and is still there with the same size."""
+        size = self.completed_files.get(relative)
+        if size is None:
+            return False
+        try:
+            return (folder / relative).stat().st_size == size
+        except OSError:
+            return False
+
+    def complete_file(self, relative: str, size: int, folder: Path):
+        """Mark a file as written, saved with the next checkpoint. Safe to call from any thread."""
+        with self._lock:
+            self.completed_files[relative] = size
+        self.checkpoint(folder)
@@ -0,0 +1,62 @@
+"""
+Compare copy_tree against the previous copytree_with_progress.
+
+Builds an override heavy tree, thousands of small config and script files plus some larger ones,
+and copies it with both. Both copies go to the same filesystem as the source, like copies within
+the instances folder, so reflinks or copy_file_range are used where the filesystem supports them.
+Run from the repository root: python benchmarks/copy_tree.py [files] [runs]
+"""
+import asyncio, os, random, shutil, sys, tempfile, time
+from aioshutil import copy2
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers import copy_tree
+
+def make_tree(root: Path, files: int):
+    rng = random.Random(0)
+    for i in range(files):
+        folder = root / rng.choice(["config", "kubejs/server_scripts", "defaultconfigs", "config/mod"]) / str(i // 300)
+        folder.mkdir(parents=True, exist_ok=True)
+        (folder / f"file{i}.toml").write_bytes(os.urandom(rng.randint(200, 8000)))
+    (root / "mods").mkdir(exist_ok=True)
+    for i in range(max(1, files // 500)):
+        (root / "mods" / f"bundled{i}.jar").write_bytes(os.urandom(4 * 1024**2))
+
+async def copytree_previous(src: Path, dst: Path):
+    """The previous copytree_with_progress, walks the tree twice and copies file by file with aioshutil."""
+    total = sum(len(files) for _, _, files in os.walk(src))
+    done = 0
+    for root, dirs, files in os.walk(src):
+        target_dir = dst / Path(root).relative_to(src)
+        target_dir.mkdir(parents=True, exist_ok=True)
+        for file in files:
+            await copy2(Path(root) / file, target_dir / file)
+            done += 1
+
+def measure(name: str, copy, src: Path, folder: Path, runs: int):
+    timings = []
+    for run in range(runs):
+        dest = folder / f"{name}-{run}"
+        start = time.perf_counter()
+        copy(src, dest)
+        timings.append(time.perf_counter() - start)
+        shutil.rmtree(dest)
+    best = min(timings)
+    print(f"{name:<12} best {best:.3f}s  (mean {sum(timings) / runs:.3f}s over {runs} runs)")
+
+def main(files: int, runs: int):
+    with tempfile.TemporaryDirectory(dir='.') as tmp:
+        folder = Path(tmp)
+        src = folder / "overrides"
+        make_tree(src, files)
+        print(f"Copying {files} small files and {max(1, files // 500)} jars, {runs} runs each, {os.cpu_count()} cpu cores")
+        measure("previous", lambda src, dest: asyncio.run(copytree_previous(src, dest)), src, folder, runs)
+        measure("copy_tree", copy_tree, src, folder, runs)
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    )
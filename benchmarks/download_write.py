@@ -0,0 +1,69 @@
+"""
+Compare download_file write throughput against the previous per-chunk aiofiles writes.
+
+Serves random data from a local HTTP server, so only the client side is measured.
+Run from the repository root: python benchmarks/download_write.py [size_mb] [runs]
+"""
+import asyncio, aiofiles, os, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from helpers import download_file, get_http_client, close_http_client
+
+class _Handler(BaseHTTPRequestHandler):
+    payload = b''
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(self.payload)))
+        self.end_headers()
+        view = memoryview(self.payload)
+        for i in range(0, len(view), 1024 * 1024):
+            self.wfile.write(view[i:i + 1024 * 1024])
+
+    def log_message(self, *args):
+        pass
+
+async def download_per_chunk(url: str, dest: Path):
+    """The previous download_file body, one aiofiles write per 16 KB chunk."""
+    async with get_http_client().stream("GET", url) as resp:
+        resp.raise_for_status()
+        async with aiofiles.open(dest, "wb") as f:
+            async for chunk in resp.aiter_bytes(16384):
+                await f.write(chunk)
+
+async def measure(name: str, download, url: str, folder: Path, size: int, runs: int):
+    timings = []
+    for run in range(runs):
+        dest = folder / f"{name}-{run}.bin"
+        start = time.perf_counter()
+        await download(url, dest)
+        timings.append(time.perf_counter() - start)
+        assert dest.stat().st_size == size
+        dest.unlink()
+    best = min(timings)
+    print(f"{name:<12} best {best:.3f}s  {size / best / 1024**2:8.1f} MB/s  (mean {sum(timings) / runs:.3f}s over {runs} runs)")
+
+async def main(size_mb: int, runs: int):
+    size = size_mb * 1024**2
+    _Handler.payload = os.urandom(size)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/file.bin"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        print(f"Downloading {size_mb} MB, {runs} runs each")
+        await measure("per-chunk", download_per_chunk, url, folder, size, runs)
+        await measure("buffered", download_file, url, folder, size, runs)
+
+    await close_http_client()
+    server.shutdown()
+
+if __name__ == '__main__':
+    asyncio.run(main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 256,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+    ))
@@ -0,0 +1,63 @@
+"""
+Compare modpack extraction against the previous single threaded zip extraction.
+
+Builds a synthetic pack of many small config and script files plus a few larger ones, like packs
+with big KubeJS and config folders, and extracts its overrides with every method.
+Run from the repository root: python benchmarks/zip_extract.py [entries] [runs] [workers]
+"""
+import os, random, shutil, sys, tempfile, time, zipfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from backend.installer.modpack import extract_members, override_members
+
+WORDS = [b"enabled", b"true", b"false", b"radius", b"spawn", b"weight", b"item", b"recipe", b"event", b"0.5", b"64", b"minecraft:stone"]
+
+def make_pack(path: Path, entries: int):
+    """Write a pack with `entries` small deflated text files and a few larger binary ones."""
+    rng = random.Random(0)
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        for i in range(entries):
+            folder = rng.choice(["config", "kubejs/server_scripts", "kubejs/data", "defaultconfigs"])
+            text = b"\n".join(b" = ".join(rng.choices(WORDS, k=2)) for _ in range(rng.randint(20, 400)))
+            z.writestr(f"overrides/{folder}/{i // 500}/file{i}.toml", text)
+        for i in range(entries // 1000):
+            z.writestr(f"overrides/mods/bundled{i}.jar", os.urandom(2 * 1024**2))
+
+def extract_serial(pack: Path, dest: Path):
+    """The previous extraction, every member extracted one after another by a single thread."""
+    with zipfile.ZipFile(pack) as z:
+        for member in z.namelist():
+            z.extract(member, dest)
+
+def measure(name: str, extract, pack: Path, folder: Path, runs: int):
+    timings = []
+    for run in range(runs):
+        dest = folder / f"{name}-{run}"
+        start = time.perf_counter()
+        extract(pack, dest)
+        timings.append(time.perf_counter() - start)
+        shutil.rmtree(dest)
+    best = min(timings)
+    print(f"{name:<12} best {best:.3f}s  (mean {sum(timings) / runs:.3f}s over {runs} runs)")
+
+def main(entries: int, runs: int, workers: int):
+    with tempfile.TemporaryDirectory() as tmp:
+        folder = Path(tmp)
+        pack = folder / "pack.zip"
+        make_pack(pack, entries)
+        with zipfile.ZipFile(pack) as z:
+            members = override_members(z, ["overrides"])
+        print(f"Extracting {len(members)} files ({pack.stat().st_size / 1024**2:.1f} MB zipped), {runs} runs each, {os.cpu_count()} cpu cores")
+
+        measure("serial", extract_serial, pack, folder, runs)
+        measure("1 thread", lambda pack, dest: extract_members(pack, dest, members, workers=1), pack, folder, runs)
+        measure(f"{workers} threads", lambda pack, dest: extract_members(pack, dest, members, workers=workers), pack, folder, runs)
+
+if __name__ == '__main__':
+    main(
+        int(sys.argv[1]) if len(sys.argv) > 1 else 20000,
+        int(sys.argv[2]) if len(sys.argv) > 2 else 3,
+        int(sys.argv[3]) if len(sys.argv) > 3 else min(8, os.cpu_count() or 1),
+    )
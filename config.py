@@ -1,2 +1,76 @@
 DATE_FORMAT = "%d.%m.%Y"
-TIME_FORMAT = "%H:%M:%S"
\ No newline at end of file
+TIME_FORMAT = "%H:%M:%S"
+PROGRESS_FPS = 15 # progress bar and label updates per second during installs
+INSTALL_JOURNAL_SAVE_INTERVAL = 1.0 # seconds between saves of completed files of an install, finished steps are saved right away
+
+# HTTP client
+HTTP_TIMEOUT = 15.0 # seconds
+HTTP_MAX_CONNECTIONS = 32 # total pooled connections
+HTTP_MAX_CONNECTIONS_PER_HOST = 8 # concurrent requests per host
+HTTP_KEEPALIVE_EXPIRY = 30.0 # seconds an idle connection is kept open
+HTTP2_ENABLED = True # only used if the optional 'h2' package is installed
+
+# HTTP cache, API responses stored on disk between sessions
+HTTP_CACHE_ENABLED = True
+HTTP_CACHE_PATH = "cache/http.sqlite"
+HTTP_CACHE_MAX_BYTES = 256 * 1024**2 # least recently used responses are evicted above this size
+HTTP_CACHE_TTL = 600 # seconds a stored response is used without asking the server
+HTTP_CACHE_MAX_STALE = 7 * 24 * 3600 # seconds an outdated response is still used while it's revalidated in the background
+MEMORY_CACHE_MAX_BYTES = 32 * 1024**2 # parsed responses kept in memory, counted by the size of their body, least recently used are evicted above this
+
+# Modrinth
+MODRINTH_CACHE_TTLS = { # seconds responses are used without asking the server by endpoint prefix, others use HTTP_CACHE_TTL
+    "tag/": 24 * 3600, # categories and loaders hardly ever change
+    "search": 60,
+}
+MODRINTH_BATCH_URL_LENGTH = 4000 # max length of the encoded ids of one /projects or /versions request
+MODRINTH_BATCH_CONCURRENCY = 4 # batch requests of one lookup running at the same time
+MODRINTH_MAX_CONCURRENCY = 8 # API requests running at the same time while plenty of the rate limit is left
+MODRINTH_RATE_LIMIT_RETRIES = 3 # times a request answered with 429 is sent again once the rate limit resets
+
+# Downloads
+DOWNLOAD_WORKERS = 6 # files downloaded at the same time
+DOWNLOAD_MAX_PER_HOST = 4 # concurrent downloads from the same host
+DOWNLOAD_ATTEMPTS = 5 # tries per file, spread over its mirrors
+DOWNLOAD_BACKOFF_BASE = 1.0 # seconds, doubled after every failed round
+DOWNLOAD_BACKOFF_MAX = 30.0 # seconds
+DOWNLOAD_CACHE_ENABLED = True # share downloaded files with a known sha512 between instances
+DOWNLOAD_CACHE_DIR = "cache/downloads"
+DOWNLOAD_CACHE_MAX_BYTES = 4 * 1024**3 # least recently used files are evicted above this size
+DOWNLOAD_CACHE_HARDLINK = False # hardlink cached files into instances where reflinks aren't supported, saves space but a file edited in place changes for every instance sharing it
+DISK_SPACE_MARGIN = 256 * 1024**2 # free space kept on top of what an install needs
+WRITE_BUFFER_MIN = 64 * 1024 # bytes, smallest batch written to disk at once
+WRITE_BUFFER_MAX = 4 * 1024**2 # bytes, largest batch written to disk at once
+WRITE_BUFFER_TARGET_SECONDS = 0.05 # batch size adapts to one write per this many seconds of download
+
+# Modloader templates, server trees of finished modloader installs reused for new instances
+MODLOADER_TEMPLATES_ENABLED = True
+MODLOADER_TEMPLATES_DIR = "cache/templates"
+
+# Minecraft cache, version jsons and server jars shared by all instances
+MINECRAFT_CACHE_ENABLED = True
+MINECRAFT_CACHE_DIR = "cache/minecraft"
+
+# Version catalogs, modloader version feeds stored on disk
+CATALOG_DIR = "cache/catalogs"
+CATALOG_MAX_AGE = 3600 # seconds before a stored feed is revalidated in the background
+
+# Subprocesses
+PROCESS_TIMEOUT = 1800 # seconds a modloader installer may run before it's killed, 0 = no limit
+
+# Copying
+COPY_WORKERS = 0 # threads copying directory trees, 0 = one per cpu core, up to 8
+COPY_BATCH_FILES = 64 # small files handed to a copy thread at once
+COPY_BATCH_BYTES = 4 * 1024**2 # bytes per batch of small files, larger files are copied on their own
+
+# Extraction
+EXTRACT_WORKERS = 0 # threads extracting a modpack, 0 = one per cpu core, up to 8
+EXTRACT_PARALLEL_MIN = 256 # packs with fewer files are extracted by a single thread
+
+# Throttling, in bytes per second, 0 = unlimited. Applies to all downloads and copies together,
+# install jobs can set additional limits of their own.
+DOWNLOAD_BANDWIDTH_LIMIT = 0
+DISK_WRITE_LIMIT = 0
+# Limits of a single modpack install, on top of the ones above
+INSTALL_BANDWIDTH_LIMIT = 0
+INSTALL_DISK_WRITE_LIMIT = 0
\ No newline at end of file
@@ -11,11 +11,48 @@ __all__ = [
     "DebounceMixin",
     "NavigationMixin",
     "download_file",
+    "DownloadJob",
+    "DownloadScheduler",
+    "DownloadError",
+    "hash_file",
+    "FileCache",
+    "download_cache",
+    "link_file",
+    "copy_tree",
+    "async_copy_tree",
+    "copy_file",
+    "TokenBucket",
+    "throttle",
+    "bandwidth_limiter",
+    "disk_write_limiter",
+    "ProgressBus",
+    "ProgressEvent",
+    "StepStarted",
+    "StepFinished",
+    "BytesProgress",
+    "ItemProgress",
+    "Status",
+    "StepWeights",
+    "BufferedFileWriter",
     "format_date",
     "ModloaderType",
     "sanitize_filename",
     "strip_images",
     "filter_data",
+    "run_process",
+    "kill_process_tree",
+    "ProcessError",
+    "HttpClient",
+    "get_http_client",
+    "close_http_client",
+    "HttpCache",
+    "CacheEntry",
+    "http_cache",
+    "MemoryCache",
+    "CacheStats",
+    "RateLimitScheduler",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BACKGROUND",
 ]
 
 if TYPE_CHECKING:
@@ -27,7 +64,18 @@ if TYPE_CHECKING:
     from .customverticalscroll import CustomVerticalScroll
     from .debouncemixin import DebounceMixin
     from .navigationmixin import NavigationMixin
-    from .utils import format_date, sanitize_filename, download_file, ModloaderType, strip_images, filter_data
+    from .utils import format_date, sanitize_filename, ModloaderType, strip_images, filter_data
+    from .downloader import download_file, DownloadJob, DownloadScheduler, DownloadError, hash_file
+    from .filecache import FileCache, download_cache, link_file
+    from .copytree import copy_tree, async_copy_tree, copy_file
+    from .throttle import TokenBucket, throttle, bandwidth_limiter, disk_write_limiter
+    from .progress import ProgressBus, ProgressEvent, StepStarted, StepFinished, BytesProgress, ItemProgress, Status, StepWeights
+    from .bufferedwriter import BufferedFileWriter
+    from .process import run_process, kill_process_tree, ProcessError
+    from .httpclient import HttpClient, get_http_client, close_http_client
+    from .httpcache import HttpCache, CacheEntry, http_cache
+    from .memorycache import MemoryCache, CacheStats
+    from .ratelimit import RateLimitScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
 
 # Map attribute names to their modules
 _lazy_map = {
@@ -41,10 +89,47 @@ _lazy_map = {
     "NavigationMixin": ".navigationmixin",
     "format_date": ".utils",
     "sanitize_filename": ".utils",
-    "download_file": ".utils",
+    "download_file": ".downloader",
+    "DownloadJob": ".downloader",
+    "DownloadScheduler": ".downloader",
+    "DownloadError": ".downloader",
+    "hash_file": ".downloader",
+    "FileCache": ".filecache",
+    "download_cache": ".filecache",
+    "link_file": ".filecache",
+    "copy_tree": ".copytree",
+    "async_copy_tree": ".copytree",
+    "copy_file": ".copytree",
+    "TokenBucket": ".throttle",
+    "throttle": ".throttle",
+    "bandwidth_limiter": ".throttle",
+    "disk_write_limiter": ".throttle",
+    "ProgressBus": ".progress",
+    "ProgressEvent": ".progress",
+    "StepStarted": ".progress",
+    "StepFinished": ".progress",
+    "BytesProgress": ".progress",
+    "ItemProgress": ".progress",
+    "Status": ".progress",
+    "StepWeights": ".progress",
+    "BufferedFileWriter": ".bufferedwriter",
     "ModloaderType": ".utils",
     "strip_images": ".utils",
     "filter_data": ".utils",
+    "run_process": ".process",
+    "kill_process_tree": ".process",
+    "ProcessError": ".process",
+    "HttpClient": ".httpclient",
+    "get_http_client": ".httpclient",
+    "close_http_client": ".httpclient",
+    "HttpCache": ".httpcache",
+    "CacheEntry": ".httpcache",
+    "http_cache": ".httpcache",
+    "MemoryCache": ".memorycache",
+    "CacheStats": ".memorycache",
+    "RateLimitScheduler": ".ratelimit",
+    "PRIORITY_INTERACTIVE": ".ratelimit",
+    "PRIORITY_BACKGROUND": ".ratelimit",
 }
 
 def __getattr__(name: str):
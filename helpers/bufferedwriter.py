@@ -0,0 +1,83 @@
+import asyncio, time
+from pathlib import Path
+
+from config import WRITE_BUFFER_MIN, WRITE_BUFFER_MAX, WRITE_BUFFER_TARGET_SECONDS
+
+class BufferedFileWriter:
+    """
+    Async file writer that batches small chunks into large writes.
+
+    Each file gets one writer. Batches are written in a worker thread while the next batch fills,
+    so receiving and writing overlap, and there is one thread hop per batch instead of one per chunk.
+    The batch size adapts to the incoming data rate, aiming for one write every
+    `target_seconds`, between `min_buffer` and `max_buffer` bytes.
+    An optional `hasher` is updated with every batch in the worker thread too.
+    """
+    def __init__(
+        self,
+        path: Path,
+        mode: str = 'wb',
+        hasher=None,
+        min_buffer: int = WRITE_BUFFER_MIN,
+        max_buffer: int = WRITE_BUFFER_MAX,
+        target_seconds: float = WRITE_BUFFER_TARGET_SECONDS,
+    ):
+        self.path = path
+        self.mode = mode
+        self.hasher = hasher
+        self.min_buffer = min_buffer
+        self.max_buffer = max_buffer
+        self.target_seconds = target_seconds
+        self.buffer_size = min_buffer
+        self._buffer = bytearray()
+        self._file = None
+        self._pending: asyncio.Future | None = None
+        self._last_flush = time.monotonic()
+
+    async def __aenter__(self) -> "BufferedFileWriter":
+        self._file = await asyncio.to_thread(open, self.path, self.mode)
+        self._last_flush = time.monotonic()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def write(self, data: bytes):
+        self._buffer += data
+        if len(self._buffer) >= self.buffer_size:
+            await self.flush()
+
+    async def flush(self):
+        """Hand the buffered data to the worker thread, waits for the previous batch first."""
+        if self._pending:
+            await self._pending
+            self._pending = None
+        if not self._buffer:
+            return
+
+        now = time.monotonic()
+        rate = len(self._buffer) / max(now - self._last_flush, 1e-6)
+        self._last_flush = now
+        self.buffer_size = int(min(self.max_buffer, max(self.min_buffer, rate * self.target_seconds)))
+
+        data = bytes(self._buffer)
+        self._buffer.clear()
+        self._pending = asyncio.ensure_future(asyncio.to_thread(self._write_batch, data))
+
+    def _write_batch(self, data: bytes):
+        if self.hasher:
+            self.hasher.update(data)
+        self._file.write(data) # type: ignore
+
+    async def aclose(self):
+        """Write everything still buffered and close the file."""
+        if self._file is None:
+            return
+        try:
+            await self.flush()
+            if self._pending:
+                await self._pending
+                self._pending = None
+        finally:
+            await asyncio.to_thread(self._file.close)
+            self._file = None
@@ -0,0 +1,204 @@
+import asyncio, os, shutil, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from config import COPY_WORKERS, COPY_BATCH_FILES, COPY_BATCH_BYTES
+from .filecache import fcntl, FICLONE
+from .throttle import TokenBucket, disk_write_limiter
+
+def scan_tree(src: Path) -> tuple[list[Path], list[tuple[Path, int]]]:
+    """
+    Walk `src` a single time.
+
+    Returns:
+        tuple[list[Path], list[tuple[Path, int]]]: The directories and the files with their size, relative to `src`.
+    """
+    dirs: list[Path] = []
+    files: list[tuple[Path, int]] = []
+    stack = [Path()]
+    while stack:
+        folder = stack.pop()
+        with os.scandir(src / folder) as entries:
+            for entry in entries:
+                relative = folder / entry.name
+                if entry.is_dir(follow_symlinks=False):
+                    dirs.append(relative)
+                    stack.append(relative)
+                elif entry.is_file():
+                    files.append((relative, entry.stat().st_size))
+    return dirs, files
+
+def copy_file(src: Path, dst: Path, hardlink: bool = False) -> str:
+    """
+    Copy a single file with the cheapest method the filesystem supports.
+
+    Tries a hardlink first if `hardlink` is allowed (both paths are the same file then, changes show
+    in both), then a reflink, then an in kernel `copy_file_range`, then a regular copy.
+    Copies get the metadata of `src` like `shutil.copy2`.
+
+    Returns:
+        str: The method used, 'hardlink', 'reflink', 'copy_file_range' or 'copy'.
+    """
+    if hardlink:
+        try:
+            dst.unlink(missing_ok=True)
+            os.link(src, dst)
+            return 'hardlink'
+        except OSError:
+            pass
+
+    with open(src, 'rb') as s, open(dst, 'wb') as d:
+        method = _copy_data(s, d)
+    shutil.copystat(src, dst)
+    return method
+
+def _copy_data(s, d) -> str:
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            return 'reflink'
+        except OSError:
+            pass
+
+    if hasattr(os, 'copy_file_range'):
+        try:
+            while os.copy_file_range(s.fileno(), d.fileno(), 1024**3):
+                pass
+            return 'copy_file_range'
+        except OSError:
+            # not supported between these filesystems, start over with a regular copy
+            s.seek(0)
+            d.seek(0)
+            d.truncate()
+
+    shutil.copyfileobj(s, d, 1024 * 1024)
+    return 'copy'
+
+def copy_worker_count(files: int, workers: int = COPY_WORKERS) -> int:
+    """Get the number of threads to copy `files` files with."""
+    return max(1, min(workers or min(8, os.cpu_count() or 1), files))
+
+def batch_files(files: list[tuple[Path, int]], max_files: int = COPY_BATCH_FILES, max_bytes: int = COPY_BATCH_BYTES) -> list[list[tuple[Path, int]]]:
+    """
+    Group files into batches handed to one copy thread at a time, largest first.
+
+    Large files get a batch of their own, small files are grouped up to `max_files` files or `max_bytes` bytes,
+    so thousands of tiny config files don't each go through the queue.
+    """
+    batches: list[list[tuple[Path, int]]] = []
+    batch: list[tuple[Path, int]] = []
+    batch_bytes = 0
+    for file in sorted(files, key=lambda file: file[1], reverse=True):
+        if file[1] >= max_bytes:
+            batches.append([file])
+            continue
+        if batch and (len(batch) >= max_files or batch_bytes + file[1] > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(file)
+        batch_bytes += file[1]
+    if batch:
+        batches.append(batch)
+    return batches
+
+async def async_copy_tree(
+    src: Path,
+    dst: Path,
+    dirs_exist_ok: bool = False,
+    progress_cb=None,
+    item_cb=None,
+    step=None,
+    cancel_event: asyncio.Event | threading.Event | None = None,
+    limits: list[TokenBucket] | None = None,
+    hardlink=False,
+    workers: int = COPY_WORKERS
+) -> list[Path]:
+    """
+    Copy the directory tree `src` to `dst`, see `copy_tree`.
+    """
+    return await asyncio.to_thread(copy_tree, src, dst, dirs_exist_ok, progress_cb, item_cb, step, cancel_event, limits, hardlink, workers)
+
+def copy_tree(
+    src: Path,
+    dst: Path,
+    dirs_exist_ok: bool = False,
+    progress_cb=None,
+    item_cb=None,
+    step=None,
+    cancel_event: asyncio.Event | threading.Event | None = None,
+    limits: list[TokenBucket] | None = None,
+    hardlink=False,
+    workers: int = COPY_WORKERS
+) -> list[Path]:
+    """
+    Copy the directory tree `src` to `dst`, blocking.
+
+    `hardlink` allows hardlinks for all files, or for the files `hardlink(relative)` is true for.
+
+    The tree is scanned once, directories are created upfront and the files copied by a pool of threads
+    in batches, with reflinks or `copy_file_range` where the filesystem supports it (see `copy_file`).
+    Progress is reported in bytes through `progress_cb(total, done, step=)`.
+    Files that fail to copy are reported through `item_cb` and the rest is still copied,
+    the failures are raised once all files were tried, like `shutil.copytree`.
+    Copies are throttled by the global disk write limiter and `limits`.
+
+    Returns:
+        list[Path]: The copied files, relative to `src`.
+
+    Raises:
+        shutil.Error: With a `(src, dst, error)` tuple for every file that failed to copy.
+    """
+    if dst.exists() and not dirs_exist_ok:
+        raise FileExistsError(f"{dst} already exists")
+    dirs, files = scan_tree(src)
+    dst.mkdir(parents=True, exist_ok=True)
+    for folder in dirs:
+        (dst / folder).mkdir(parents=True, exist_ok=True)
+
+    queue = deque(batch_files(files))
+    total = sum(size for _, size in files)
+    done = 0
+    copied: list[Path] = []
+    errors: list[tuple[str, str, str]] = []
+    lock = threading.Lock()
+
+    def worker():
+        nonlocal done
+        while not (cancel_event and cancel_event.is_set()):
+            try:
+                batch = queue.popleft()
+            except IndexError:
+                return
+            for relative, size in batch:
+                if cancel_event and cancel_event.is_set():
+                    return
+                if item_cb:
+                    item_cb(f"Copying {relative}")
+                try:
+                    for bucket in [disk_write_limiter, *(limits or [])]:
+                        bucket.consume_blocking(size)
+                    copy_file(src / relative, dst / relative, hardlink(relative) if callable(hardlink) else hardlink)
+                except OSError as e:
+                    with lock:
+                        errors.append((str(src / relative), str(dst / relative), str(e)))
+                    if item_cb:
+                        item_cb(f"Failed to copy {src / relative}: {e}")
+                    continue
+                with lock:
+                    copied.append(relative)
+                    done += size
+                    if progress_cb and step:
+                        progress_cb(total, done, step=step)
+
+    count = copy_worker_count(len(queue), workers)
+    if count == 1:
+        worker()
+    else:
+        with ThreadPoolExecutor(count, thread_name_prefix='copy') as pool:
+            futures = [pool.submit(worker) for _ in range(count)]
+        for future in futures:
+            future.result()
+    if errors:
+        raise shutil.Error(errors)
+    return copied
@@ -0,0 +1,315 @@
+import asyncio, hashlib, httpx, os, random
+from collections import deque
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from config import DOWNLOAD_WORKERS, DOWNLOAD_MAX_PER_HOST, DOWNLOAD_ATTEMPTS, DOWNLOAD_BACKOFF_BASE, DOWNLOAD_BACKOFF_MAX
+from .httpclient import get_http_client
+from .filecache import download_cache
+from .bufferedwriter import BufferedFileWriter
+from .throttle import TokenBucket, throttle, bandwidth_limiter, disk_write_limiter
+
+class DownloadError(Exception):
+    """Raised when a download finished but the received file is incomplete or invalid."""
+
+# preferred first, only one hash is computed per file
+HASH_ALGORITHMS = ("sha512", "sha1")
+
+async def download_file(
+    url: str,
+    dest: Path,
+    progress_cb=None,
+    step=None,
+    cancel_event=None,
+    hashes: dict[str, str] | None = None,
+    mirrors: list[str] | None = None,
+    attempts: int = DOWNLOAD_ATTEMPTS,
+    limits: list[TokenBucket] | None = None,
+):
+    """
+    Download `url` to `dest`.
+
+    Data is written to `<dest>.part` and only renamed to `dest` once it's complete, so `dest` never
+    exists as a truncated file. If a `.part` file is left from a cancelled or failed attempt,
+    the download is resumed from there with a `Range` request.
+
+    If `hashes` (e.g. Modrinth's `{"sha1": ..., "sha512": ...}`) are given, the file is hashed while
+    it's streamed and rejected if it doesn't match. An existing `dest` with a matching hash is not
+    downloaded again. Files with a sha512 are linked from the shared download cache if they're in it
+    and added to it after downloading.
+
+    Failed attempts are retried with exponential backoff and jitter, up to `attempts` tries in total.
+    Each retry moves on to the next of `url` and its `mirrors`, wrapping around.
+
+    Received data is throttled by the global bandwidth and disk write limiters and any
+    job specific `limits`.
+
+    Raises:
+        DownloadError: If the server sent less data than announced or the hash doesn't match.
+        httpx.HTTPError: If the last attempt failed on the request itself.
+    """
+    algorithm, expected = _pick_hash(hashes)
+    if algorithm and dest.exists() and await asyncio.to_thread(hash_file, dest, algorithm) == expected:
+        if progress_cb:
+            size = dest.stat().st_size
+            progress_cb(size, size, step=step)
+        return
+
+    sha512 = (hashes or {}).get("sha512")
+    if sha512 and await asyncio.to_thread(download_cache.link_into, sha512, dest):
+        if progress_cb:
+            size = dest.stat().st_size
+            progress_cb(size, size, step=step)
+        return
+
+    urls = [url] + [mirror for mirror in mirrors or [] if mirror != url]
+    attempts = max(1, attempts)
+    for attempt in range(attempts):
+        try:
+            if not await _download_attempt(urls[attempt % len(urls)], dest, progress_cb, step, cancel_event, algorithm, expected, limits or []):
+                return # cancelled
+            break
+        except (httpx.HTTPError, DownloadError) as e:
+            if attempt == attempts - 1 or not _is_retryable(e, len(urls) > 1):
+                raise
+            # a different mirror can be tried right away, the same host gets some time to recover
+            if len(urls) == 1 or (attempt + 1) % len(urls) == 0:
+                await _backoff(attempt, e, cancel_event)
+            if cancel_event and cancel_event.is_set():
+                return
+
+    if sha512:
+        await asyncio.to_thread(download_cache.add, dest, sha512)
+
+async def _download_attempt(url: str, dest: Path, progress_cb, step, cancel_event, algorithm: str | None, expected: str | None, limits: list[TokenBucket]) -> bool:
+    """Download `url` once, resuming from `<dest>.part`. Returns `False` if cancelled."""
+    part = dest.with_name(dest.name + '.part')
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    offset = part.stat().st_size if part.exists() else 0
+    # lengths and range offsets count the bytes sent, the file has to be sent as is to match them
+    headers = {"Accept-Encoding": "identity"}
+    if offset:
+        headers["Range"] = f"bytes={offset}-"
+
+    async with get_http_client().stream("GET", url, headers=headers) as resp:
+        if resp.status_code == 416:
+            # nothing left to request, check if the part file is already complete
+            total = _range_total(resp.headers.get("Content-Range", ""))
+            if total is None or total != offset:
+                part.unlink(missing_ok=True)
+                raise DownloadError(f"Could not resume download of {dest.name}")
+            if algorithm and await asyncio.to_thread(hash_file, part, algorithm) != expected:
+                part.unlink(missing_ok=True)
+                raise DownloadError(f"Hash mismatch for {dest.name}")
+            os.replace(part, dest)
+            return True
+        resp.raise_for_status()
+
+        # a server ignoring `Accept-Encoding: identity` sends a body that is decoded while it's read
+        encoded = resp.headers.get("Content-Encoding", "identity").lower() not in ("", "identity")
+        if resp.status_code == 206:
+            if encoded or _range_start(resp.headers.get("Content-Range", "")) != offset:
+                # not the bytes the part file ends with, start over from zero
+                restart = True
+            else:
+                restart = False
+                total = _range_total(resp.headers.get("Content-Range", "")) or offset + int(resp.headers.get("Content-Length", 0))
+        else:
+            # server ignored the range request, start over
+            restart = False
+            offset = 0
+            # the length of an encoded body is not the length of the file
+            total = 0 if encoded else int(resp.headers.get("Content-Length", 0))
+
+        if not restart:
+            hasher = None
+            if algorithm:
+                # a resumed download needs the hash state of the bytes already on disk
+                hasher = await asyncio.to_thread(_hash_prefix, part, algorithm) if offset else hashlib.new(algorithm)
+
+            buckets = [bandwidth_limiter, disk_write_limiter, *limits]
+            downloaded = offset
+            # the writer also feeds the hasher, off the event loop
+            async with BufferedFileWriter(part, "ab" if offset else "wb", hasher) as f:
+                async for chunk in resp.aiter_bytes(16384):
+                    if cancel_event and cancel_event.is_set():
+                        return False
+                    await throttle(buckets, len(chunk))
+                    await f.write(chunk)
+                    downloaded += len(chunk)
+                    if progress_cb:
+                        progress_cb(total, downloaded, step=step)
+
+    if restart:
+        part.unlink(missing_ok=True)
+        return await _download_attempt(url, dest, progress_cb, step, cancel_event, algorithm, expected, limits)
+
+    if total and downloaded != total:
+        raise DownloadError(f"Incomplete download of {dest.name}: got {downloaded} of {total} bytes")
+    if hasher and hasher.hexdigest() != expected:
+        part.unlink(missing_ok=True)
+        raise DownloadError(f"Hash mismatch for {dest.name}")
+    os.replace(part, dest)
+    return True
+
+def _is_retryable(error: Exception, has_mirrors: bool) -> bool:
+    """Check if a failed download is worth another attempt."""
+    if isinstance(error, httpx.HTTPStatusError):
+        status = error.response.status_code
+        if status in (408, 425, 429) or status >= 500:
+            return True
+        # other client errors won't change on retry, but another mirror might still have the file
+        return has_mirrors
+    return True
+
+async def _backoff(attempt: int, error: Exception, cancel_event=None):
+    """Sleep before the next attempt, exponential with full jitter, honoring `Retry-After`."""
+    delay = random.uniform(0, min(DOWNLOAD_BACKOFF_MAX, DOWNLOAD_BACKOFF_BASE * 2 ** attempt))
+    if isinstance(error, httpx.HTTPStatusError):
+        retry_after = error.response.headers.get("Retry-After", "")
+        if retry_after.isdigit():
+            delay = min(DOWNLOAD_BACKOFF_MAX, float(retry_after))
+    # sleep in small steps, the cancel event may belong to another event loop and can't be awaited
+    deadline = asyncio.get_running_loop().time() + delay
+    while (remaining := deadline - asyncio.get_running_loop().time()) > 0:
+        if cancel_event and cancel_event.is_set():
+            return
+        await asyncio.sleep(min(remaining, 0.1))
+
+def hash_file(path: Path, algorithm: str = "sha512") -> str:
+    """Get the hex digest of a file."""
+    return _hash_prefix(path, algorithm).hexdigest()
+
+def _hash_prefix(path: Path, algorithm: str):
+    hasher = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            hasher.update(chunk)
+    return hasher
+
+def _pick_hash(hashes: dict[str, str] | None) -> tuple[str | None, str | None]:
+    """Get the preferred (algorithm, hex digest) out of a hashes dict."""
+    for algorithm in HASH_ALGORITHMS:
+        if hashes and hashes.get(algorithm):
+            return algorithm, hashes[algorithm].lower()
+    return None, None
+
+def _range_start(content_range: str) -> int | None:
+    """Get the first byte from a `Content-Range` header like `bytes 100-199/200`."""
+    _, _, byte_range = content_range.partition(" ")
+    start, _, _ = byte_range.partition("-")
+    return int(start) if start.isdigit() else None
+
+def _range_total(content_range: str) -> int | None:
+    """Get the full size from a `Content-Range` header like `bytes 100-199/200` or `bytes */200`."""
+    _, _, total = content_range.rpartition("/")
+    return int(total) if total.isdigit() else None
+
+@dataclass
+class DownloadJob:
+    url: str
+    dest: Path
+    size: int = 0 # expected size in bytes, 0 if unknown
+    name: str = ''
+    hashes: dict[str, str] | None = None # e.g. {"sha1": ..., "sha512": ...}
+    mirrors: list[str] = field(default_factory=list) # alternative urls for the same file
+
+class DownloadScheduler:
+    """
+    Downloads many files concurrently with a bounded number of workers.
+
+    Jobs are started largest first so big files don't end up as the tail of the run.
+    Progress is reported as bytes over all jobs through `progress_cb(total, done, step=)`,
+    `item_cb(text)` is called with the name of every job that gets started, `job_cb(job)` with every job that finished.
+    `limits` are rate limiters shared by all downloads of the run, on top of the global ones.
+    The first failing job stops the run and its exception is raised from `run()`.
+    """
+    def __init__(
+        self,
+        workers: int = DOWNLOAD_WORKERS,
+        max_per_host: int = DOWNLOAD_MAX_PER_HOST,
+        progress_cb=None,
+        item_cb=None,
+        step=None,
+        cancel_event: asyncio.Event | None = None,
+        limits: list[TokenBucket] | None = None,
+        job_cb=None,
+    ):
+        self.workers = max(1, workers)
+        self.max_per_host = max(1, max_per_host)
+        self.progress_cb = progress_cb
+        self.item_cb = item_cb
+        self.step = step
+        self.cancel_event = cancel_event
+        self.limits = limits or []
+        self.job_cb = job_cb
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._queue: deque[DownloadJob] = deque()
+        self._sizes: dict[int, int] = {}
+        self._done: dict[int, int] = {}
+        self._error: BaseException | None = None
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(self._sizes.values())
+
+    @property
+    def downloaded_bytes(self) -> int:
+        return sum(self._done.values())
+
+    async def run(self, jobs: list[DownloadJob]):
+        """Download all jobs, returns early if `cancel_event` is set."""
+        self._queue = deque(sorted(jobs, key=lambda job: job.size, reverse=True))
+        self._sizes = {id(job): job.size for job in jobs}
+        self._done = {id(job): 0 for job in jobs}
+        self._error = None
+        self._report()
+
+        await asyncio.gather(*(self._worker() for _ in range(min(self.workers, len(jobs)))))
+        await asyncio.to_thread(download_cache.evict)
+
+        if self._error:
+            raise self._error
+
+    def _stopped(self) -> bool:
+        return self._error is not None or bool(self.cancel_event and self.cancel_event.is_set())
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def _worker(self):
+        while self._queue and not self._stopped():
+            job = self._queue.popleft()
+            try:
+                async with self._host_limit(job.url):
+                    if self._stopped():
+                        return
+                    if self.item_cb:
+                        self.item_cb(f'Downloading {job.name or job.dest.name}')
+                    await download_file(job.url, job.dest, self._job_progress(job), cancel_event=self.cancel_event, hashes=job.hashes, mirrors=job.mirrors, limits=self.limits)
+                    # a cancelled download returns without its file in place
+                    if self.job_cb and job.dest.exists() and not (self.cancel_event and self.cancel_event.is_set()):
+                        self.job_cb(job)
+            except Exception as e:
+                if self._error is None:
+                    self._error = e
+                return
+
+    def _job_progress(self, job: DownloadJob):
+        key = id(job)
+        def callback(total: int, downloaded: int, step=None):
+            # use the real size once the server tells us
+            if total and total != self._sizes[key]:
+                self._sizes[key] = total
+            self._done[key] = downloaded
+            self._report()
+        return callback
+
+    def _report(self):
+        if self.progress_cb:
+            total = self.total_bytes
+            self.progress_cb(total, min(self.downloaded_bytes, total), step=self.step)
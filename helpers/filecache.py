@@ -0,0 +1,148 @@
+import hashlib, os, re, shutil, uuid
+from pathlib import Path
+
+from config import DOWNLOAD_CACHE_DIR, DOWNLOAD_CACHE_MAX_BYTES, DOWNLOAD_CACHE_ENABLED, DOWNLOAD_CACHE_HARDLINK
+
+try:
+    import fcntl
+except ImportError: # not available on windows, no reflinks there
+    fcntl = None
+
+FICLONE = 0x40049409 # linux ioctl to reflink (copy-on-write clone) a file
+
+SHA512_NAME = re.compile(r'[0-9a-f]{128}')
+
+def link_file(src: Path, dest: Path, hardlink: bool = True) -> str:
+    """
+    Make `dest` a copy of `src` without copying data where possible.
+
+    Tries a reflink first, then a hardlink if `hardlink` is allowed, then falls back to a regular copy.
+    A hardlinked `dest` is the same file as `src`, editing one in place changes both.
+    `dest` is replaced atomically if it already exists.
+
+    Returns:
+        str: The method used, 'reflink', 'hardlink' or 'copy'.
+    """
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # unique per call, jobs linking the same file at the same time don't replace each other's temp file
+    tmp = dest.with_name(f"{dest.name}.{uuid.uuid4().hex}.link")
+    method = 'copy'
+    try:
+        try:
+            if fcntl is None:
+                raise OSError('reflink not supported')
+            with open(src, 'rb') as s, open(tmp, 'wb') as d:
+                fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+            method = 'reflink'
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            try:
+                if not hardlink:
+                    raise OSError('hardlinks not allowed')
+                os.link(src, tmp)
+                method = 'hardlink'
+            except OSError:
+                shutil.copy2(src, tmp)
+        os.replace(tmp, dest)
+    finally:
+        # also left behind when dest already was a hardlink to src, renaming onto the same file does nothing
+        tmp.unlink(missing_ok=True)
+    return method
+
+class FileCache:
+    """
+    Content addressed file store keyed by sha512, shared by all instances.
+
+    Files are stored as `<root>/<first 2 hex chars>/<sha512>` and linked into instances with `link_file`,
+    as reflinks or copies unless `hardlink` is set. A stored file hardlinked into an instance is checked
+    against its hash before it's linked again, a server editing it in place would have changed it.
+    The modification time of a stored file is used as its last use time, once the store grows
+    over `max_bytes` the least recently used files are evicted.
+    """
+    def __init__(self, root: Path, max_bytes: int, enabled: bool = True, hardlink: bool = False):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hardlink = hardlink
+
+    def path_for(self, sha512: str) -> Path:
+        sha512 = sha512.lower()
+        return self.root / sha512[:2] / sha512
+
+    def get(self, sha512: str) -> Path | None:
+        """Get the stored file for a hash and mark it as used, `None` if it's not cached."""
+        if not self.enabled or not sha512:
+            return None
+        path = self.path_for(sha512)
+        try:
+            os.utime(path)
+        except OSError:
+            return None
+        return path
+
+    def link_into(self, sha512: str, dest: Path) -> bool:
+        """Link the cached file for a hash to `dest`, returns `False` if it's not cached or was changed."""
+        path = self.get(sha512)
+        if path is None:
+            return False
+        try:
+            if not self._verify(path, sha512):
+                path.unlink(missing_ok=True)
+                return False
+            link_file(path, dest, self.hardlink)
+        except OSError:
+            return False
+        return True
+
+    def _verify(self, path: Path, sha512: str) -> bool:
+        """Check that a stored file still has its hash, only hashed if it's hardlinked somewhere else."""
+        if path.stat().st_nlink <= 1:
+            # reflinks and copies are separate files, nothing outside the store can have changed it
+            return True
+        hasher = hashlib.sha512()
+        with open(path, 'rb') as f:
+            while chunk := f.read(1024 * 1024):
+                hasher.update(chunk)
+        return hasher.hexdigest() == sha512.lower()
+
+    def add(self, path: Path, sha512: str):
+        """Add a file with a known (already verified) sha512 to the store."""
+        if not self.enabled or not sha512:
+            return
+        cached = self.path_for(sha512)
+        if cached.exists():
+            os.utime(cached)
+            return
+        try:
+            link_file(path, cached, self.hardlink)
+        except OSError:
+            # caching is best effort, the download itself succeeded
+            return
+
+    def evict(self):
+        """Remove least recently used files until the store fits into `max_bytes`."""
+        if not self.root.exists():
+            return
+        entries = []
+        total = 0
+        for file in self.root.glob('*/*'):
+            # temp files of links in progress are not entries, they're neither counted nor removed
+            if not SHA512_NAME.fullmatch(file.name):
+                continue
+            try:
+                stat = file.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, file))
+            total += stat.st_size
+        entries.sort()
+        for _, size, file in entries:
+            if total <= self.max_bytes:
+                break
+            file.unlink(missing_ok=True)
+            total -= size
+
+    def clear(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+
+download_cache = FileCache(Path(DOWNLOAD_CACHE_DIR), DOWNLOAD_CACHE_MAX_BYTES, DOWNLOAD_CACHE_ENABLED, DOWNLOAD_CACHE_HARDLINK)
@@ -0,0 +1,167 @@
+import sqlite3, threading, time
+from dataclasses import dataclass
+from pathlib import Path
+
+from config import HTTP_CACHE_ENABLED, HTTP_CACHE_PATH, HTTP_CACHE_MAX_BYTES
+
+@dataclass
+class CacheEntry:
+    body: bytes
+    etag: str | None
+    last_modified: str | None
+    stored: float # time the body was last fetched or revalidated
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.stored
+
+class HttpCache:
+    """
+    Persistent cache of API responses in a sqlite database, surviving restarts.
+
+    Entries keep the ETag and Last-Modified of their response so they can be revalidated with
+    a conditional request. Once the stored bodies grow over `max_bytes`, the least recently
+    used entries are evicted. The methods block, call them through `asyncio.to_thread`.
+    Errors of the database are swallowed, a broken cache only means more requests.
+    """
+    def __init__(self, path: Path, max_bytes: int, enabled: bool = True):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._size = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # used from worker threads of several event loops, access is serialized by the lock
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS entries (
+                    key TEXT PRIMARY KEY,
+                    body BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    stored REAL NOT NULL,
+                    used REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries (used)")
+            self._size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> CacheEntry | None:
+        """Get the entry for a key and mark it as used, `None` if it's not cached."""
+        if not self.enabled:
+            return None
+        try:
+            with self._lock:
+                conn = self._connect()
+                row = conn.execute("SELECT body, etag, last_modified, stored FROM entries WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return None
+                with conn:
+                    conn.execute("UPDATE entries SET used = ? WHERE key = ?", (time.time(), key))
+        except sqlite3.Error:
+            return None
+        return CacheEntry(*row)
+
+    def put(self, key: str, body: bytes, etag: str | None = None, last_modified: str | None = None):
+        """Store a response body, replacing the previous entry of the key."""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                    conn.execute(
+                        "INSERT OR REPLACE INTO entries (key, body, etag, last_modified, stored, used, size) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (key, body, etag, last_modified, now, now, len(body))
+                    )
+                self._size += len(body) - (old[0] if old else 0)
+                if self._size > self.max_bytes:
+                    self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def get_many(self, keys: list[str]) -> dict[str, CacheEntry]:
+        """Get the cached entries of several keys at once and mark them as used, keys that aren't cached are left out."""
+        if not self.enabled or not keys:
+            return {}
+        entries = {}
+        try:
+            with self._lock:
+                conn = self._connect()
+                # sqlite allows at most 999 parameters per statement
+                for start in range(0, len(keys), 500):
+                    chunk = keys[start:start + 500]
+                    marks = ','.join('?' * len(chunk))
+                    for key, *row in conn.execute(f"SELECT key, body, etag, last_modified, stored FROM entries WHERE key IN ({marks})", chunk):
+                        entries[key] = CacheEntry(*row)
+                    with conn:
+                        conn.execute(f"UPDATE entries SET used = ? WHERE key IN ({marks})", (time.time(), *chunk))
+        except sqlite3.Error:
+            return {}
+        return entries
+
+    def put_many(self, items: dict[str, bytes]):
+        """Store several response bodies without validators in a single transaction."""
+        if not self.enabled or not items:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    for key, body in items.items():
+                        old = conn.execute("SELECT size FROM entries WHERE key = ?", (key,)).fetchone()
+                        conn.execute(
+                            "INSERT OR REPLACE INTO entries (key, body, etag, last_modified, stored, used, size) VALUES (?, ?, NULL, NULL, ?, ?, ?)",
+                            (key, body, now, now, len(body))
+                        )
+                        self._size += len(body) - (old[0] if old else 0)
+                if self._size > self.max_bytes:
+                    self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def touch(self, key: str):
+        """Mark an entry as fresh again after the server confirmed it's unchanged."""
+        if not self.enabled:
+            return
+        now = time.time()
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("UPDATE entries SET stored = ?, used = ? WHERE key = ?", (now, now, key))
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn: sqlite3.Connection):
+        """Remove least recently used entries until the cache fits into `max_bytes`, with the lock held."""
+        with conn:
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY used").fetchall():
+                if self._size <= self.max_bytes:
+                    break
+                conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._size -= size
+
+    def clear(self):
+        try:
+            with self._lock:
+                conn = self._connect()
+                with conn:
+                    conn.execute("DELETE FROM entries")
+                self._size = 0
+        except sqlite3.Error:
+            pass
+
+http_cache = HttpCache(Path(HTTP_CACHE_PATH), HTTP_CACHE_MAX_BYTES, HTTP_CACHE_ENABLED)
@@ -0,0 +1,84 @@
+import asyncio, httpx
+from contextlib import asynccontextmanager
+from importlib.util import find_spec
+from typing import AsyncIterator
+from urllib.parse import urlsplit
+from weakref import WeakKeyDictionary
+
+from config import HTTP_TIMEOUT, HTTP_MAX_CONNECTIONS, HTTP_MAX_CONNECTIONS_PER_HOST, HTTP_KEEPALIVE_EXPIRY, HTTP2_ENABLED
+
+class HttpClient:
+    """
+    Pooled `httpx.AsyncClient` with keep-alive, optional HTTP/2 and per-host connection limits.
+
+    Use `get_http_client()` instead of creating this directly, so all requests share one pool.
+    """
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_per_host: int = HTTP_MAX_CONNECTIONS_PER_HOST,
+        timeout: float = HTTP_TIMEOUT,
+        http2: bool = HTTP2_ENABLED,
+    ):
+        self.max_per_host = max_per_host
+        self.http2 = http2 and find_spec("h2") is not None # http2 needs the optional 'h2' package
+        self._host_limits: dict[str, asyncio.Semaphore] = {}
+        self._client = httpx.AsyncClient(
+            http2=self.http2,
+            timeout=timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+        )
+
+    @property
+    def is_closed(self) -> bool:
+        return self._client.is_closed
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        """Get the semaphore limiting concurrent requests to the host of `url`."""
+        host = urlsplit(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.max_per_host)
+        return self._host_limits[host]
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        """Send a GET request through the shared pool."""
+        return await self.request("GET", url, **kwargs)
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        """Send a request through the shared pool, respecting the per-host limit."""
+        async with self._host_limit(url):
+            return await self._client.request(method, url, **kwargs)
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs) -> AsyncIterator[httpx.Response]:
+        """Stream a response through the shared pool, holding a per-host slot until the body is consumed."""
+        async with self._host_limit(url):
+            async with self._client.stream(method, url, **kwargs) as resp:
+                yield resp
+
+    async def aclose(self):
+        await self._client.aclose()
+
+# Textual thread workers run their own event loop, connections can't be shared between loops,
+# so there is one pooled client per running loop.
+_clients: "WeakKeyDictionary[asyncio.AbstractEventLoop, HttpClient]" = WeakKeyDictionary()
+
+def get_http_client() -> HttpClient:
+    """Get the shared HTTP client for the running event loop, creating it on first use."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = HttpClient()
+        _clients[loop] = client
+    return client
+
+async def close_http_client():
+    """Close the shared HTTP client of the running event loop, if there is one."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
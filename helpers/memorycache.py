@@ -0,0 +1,68 @@
+import threading, time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0 # misses because the entry was too old
+    evictions: int = 0 # entries dropped to stay within the budget
+    entries: int = 0
+    bytes: int = 0
+
+class MemoryCache:
+    """
+    Least recently used in-memory cache with a budget in bytes and a ttl per entry.
+
+    The size of an entry is given when it's stored, e.g. the length of the response body it was parsed
+    from, and counted against `max_bytes`. Storing over the budget evicts the least recently used
+    entries first. Safe to use from several threads.
+    """
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[Any, int, float]] = OrderedDict() # key -> (value, size, expires)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        """Get a value and mark it as used, `None` if it's not cached or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.stats.misses += 1
+                return None
+            value, size, expires = entry
+            if time.monotonic() >= expires:
+                self._remove(key)
+                self.stats.misses += 1
+                self.stats.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, size: int, ttl: float):
+        """Store a value of `size` bytes for `ttl` seconds, values larger than the whole budget aren't stored."""
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size, time.monotonic() + ttl)
+            self.stats.entries += 1
+            self.stats.bytes += size
+            while self.stats.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.stats.evictions += 1
+
+    def _remove(self, key: str):
+        _, size, _ = self._entries.pop(key)
+        self.stats.entries -= 1
+        self.stats.bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.stats.entries = self.stats.bytes = 0
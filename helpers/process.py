@@ -0,0 +1,112 @@
+import asyncio, os, signal, subprocess, sys, threading
+from collections import deque
+from pathlib import Path
+
+from config import PROCESS_TIMEOUT
+
+class ProcessError(Exception):
+    """A process exited with an error, timed out or was cancelled."""
+    def __init__(self, message: str, returncode: int | None = None, output: list[str] | None = None):
+        super().__init__(message)
+        self.returncode = returncode
+        self.output = output or [] # last lines of output
+
+async def run_process(
+    cmd: list[str | Path],
+    cwd: Path | None = None,
+    line_cb=None,
+    cancel_event: asyncio.Event | threading.Event | None = None,
+    timeout: float = PROCESS_TIMEOUT,
+    tail: int = 20
+) -> int:
+    """
+    Run a command without blocking the event loop, streaming its output.
+
+    Stdout and stderr are merged and `line_cb(line)` is called with every line as it's printed.
+    If `cancel_event` is set or the process runs longer than `timeout` seconds (0 = no limit),
+    the process and everything it started are killed.
+
+    Returns:
+        int: The exit code, always 0.
+
+    Raises:
+        ProcessError: If the process exited with another code, timed out or was cancelled, with its last `tail` lines of output.
+    """
+    kwargs = {}
+    if sys.platform == 'win32':
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        # own process group, so the whole tree can be killed at once
+        kwargs["start_new_session"] = True
+
+    proc = await asyncio.create_subprocess_exec(
+        *(str(part) for part in cmd),
+        cwd=cwd,
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.STDOUT,
+        **kwargs
+    )
+    output: deque[str] = deque(maxlen=tail)
+
+    def emit(line: bytes):
+        text = line.decode(errors='replace').rstrip()
+        output.append(text)
+        if line_cb:
+            line_cb(text)
+
+    async def read_lines():
+        assert proc.stdout is not None
+        # read in chunks instead of readline(), which fails on lines over the 64 KiB stream limit
+        # (installers print whole classpaths on one line)
+        partial = bytearray()
+        while chunk := await proc.stdout.read(65536):
+            first, *rest = chunk.split(b'\n')
+            partial += first
+            if rest:
+                emit(partial)
+                for line in rest[:-1]:
+                    emit(line)
+                partial = bytearray(rest[-1])
+        if partial:
+            emit(partial)
+
+    reader = asyncio.create_task(read_lines())
+    waiter = asyncio.create_task(proc.wait())
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout if timeout else None
+    stopped = None
+    try:
+        # the cancel event may belong to another event loop, so it's polled instead of awaited
+        while not waiter.done():
+            await asyncio.wait({waiter}, timeout=0.2)
+            if waiter.done():
+                break
+            if cancel_event and cancel_event.is_set():
+                stopped = 'cancelled'
+            elif deadline is not None and loop.time() > deadline:
+                stopped = f'timed out after {timeout:.0f}s'
+            if stopped:
+                kill_process_tree(proc.pid)
+                break
+        returncode = await waiter
+        await reader
+    except asyncio.CancelledError:
+        kill_process_tree(proc.pid)
+        raise
+
+    if stopped:
+        raise ProcessError(f"{Path(str(cmd[0])).name} {stopped}", returncode, list(output))
+    if returncode != 0:
+        raise ProcessError(f"{Path(str(cmd[0])).name} exited with code {returncode}: {output[-1] if output else 'no output'}", returncode, list(output))
+    return returncode
+
+def kill_process_tree(pid: int):
+    """Kill a process started by `run_process` and all processes it started."""
+    try:
+        if sys.platform == 'win32':
+            subprocess.run(["taskkill", "/F", "/T", "/PID", str(pid)], capture_output=True)
+        else:
+            os.killpg(pid, signal.SIGKILL)
+    except (OSError, subprocess.SubprocessError):
+        pass
@@ -0,0 +1,88 @@
+import threading
+from dataclasses import dataclass
+
+@dataclass(frozen=True)
+class StepStarted:
+    step: int
+    label: str
+
+@dataclass(frozen=True)
+class StepFinished:
+    step: int
+
+@dataclass(frozen=True)
+class BytesProgress:
+    total: int
+    done: int
+    step: int = 0
+
+@dataclass(frozen=True)
+class ItemProgress:
+    total: int
+    done: int
+    step: int = 0
+
+@dataclass(frozen=True)
+class Status:
+    text: str
+
+@dataclass(frozen=True)
+class StepWeights:
+    weights: tuple[int, ...] # share of the overall progress per step, index 0 unused
+
+ProgressEvent = StepStarted | StepFinished | BytesProgress | ItemProgress | Status | StepWeights
+
+class ProgressBus:
+    """
+    Thread safe, coalescing stream of progress events.
+
+    Producers (install coroutines, executor threads) call the emit methods from any thread.
+    The consumer calls `drain()` at a fixed frame rate on the app loop and gets every step
+    event in order, but only the latest progress and status event since the previous step event,
+    so per-chunk or per-file updates don't turn into one repaint each.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: list[ProgressEvent] = []
+        self._latest: dict[tuple, int] = {} # coalescing key -> index in self._events
+
+    def step_started(self, step: int, label: str):
+        self._emit_ordered(StepStarted(step, label))
+
+    def step_finished(self, step: int):
+        self._emit_ordered(StepFinished(step))
+
+    def step_weights(self, weights: list[int]):
+        self._emit_ordered(StepWeights(tuple(weights)))
+
+    def bytes(self, total: int, done: int, step: int = 0):
+        """Report byte progress, signature matches the `progress_cb` of `download_file`."""
+        self._emit_latest(('bytes', step), BytesProgress(total, done, step))
+
+    def items(self, total: int, done: int, step: int = 0):
+        self._emit_latest(('items', step), ItemProgress(total, done, step))
+
+    def status(self, text: str):
+        self._emit_latest(('status',), Status(text))
+
+    def drain(self) -> list[ProgressEvent]:
+        """Take all pending events."""
+        with self._lock:
+            events, self._events = self._events, []
+            self._latest = {}
+        return events
+
+    def _emit_ordered(self, event: ProgressEvent):
+        with self._lock:
+            self._events.append(event)
+            # updates from before a step event must not overwrite ones after it
+            self._latest = {}
+
+    def _emit_latest(self, key: tuple, event: ProgressEvent):
+        with self._lock:
+            index = self._latest.get(key)
+            if index is None:
+                self._latest[key] = len(self._events)
+                self._events.append(event)
+            else:
+                self._events[index] = event
@@ -0,0 +1,125 @@
+import asyncio, heapq, itertools, threading, time
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+PRIORITY_INTERACTIVE = 0 # something the user waits for, searches, mod pages
+PRIORITY_BACKGROUND = 1 # revalidations, metadata lookups after installs
+
+class RateLimitScheduler:
+    """
+    Admission control for an API with a request budget, like Modrinth's 300 requests per minute.
+
+    The budget is read from the `X-Ratelimit-Remaining` and `X-Ratelimit-Reset` headers of every
+    response. Requests wait in a priority queue (lower runs first, FIFO within a priority) and are only
+    started while budget is left, with fewer running at the same time as the budget runs low.
+    Once it's used up, requests wait for the reset instead of being sent and rejected.
+
+    Thread workers run their own event loops, so waiters are woken thread safely on their own loop.
+    """
+    def __init__(self, max_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.remaining: int | None = None # unknown until the first response
+        self.reset_at = 0.0 # monotonic time the budget resets
+        self._active = 0
+        self._queue: list[list] = [] # [priority, sequence, loop, future]
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+
+    def concurrency(self) -> int:
+        """Get the number of requests that may run at the same time with the remaining budget."""
+        if self.remaining is None:
+            return self.max_concurrency
+        return max(1, min(self.max_concurrency, self.remaining // 10))
+
+    def _can_start(self) -> bool:
+        if self.reset_at and time.monotonic() >= self.reset_at:
+            # the budget was refilled, its size is unknown until the next response
+            self.remaining = None
+            self.reset_at = 0.0
+        if self._active >= self.concurrency():
+            return False
+        # requests still running count against the budget too
+        return self.remaining is None or self.remaining - self._active > 0
+
+    def _wake_next(self):
+        """Wake the first waiter so it checks if it may start, with the lock held."""
+        if not self._queue:
+            return
+        _, _, loop, future = self._queue[0]
+        if future is not None:
+            try:
+                loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+            except RuntimeError: # loop already closed
+                pass
+
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_INTERACTIVE) -> AsyncIterator[None]:
+        """Wait for a turn to send a request, released once the block is left."""
+        await self._acquire(priority)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._wake_next()
+
+    async def _acquire(self, priority: int):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            entry = [priority, next(self._sequence), loop, None]
+            heapq.heappush(self._queue, entry)
+        try:
+            while True:
+                with self._lock:
+                    if self._queue[0] is entry and self._can_start():
+                        heapq.heappop(self._queue)
+                        self._active += 1
+                        # more requests may fit, let the next one check
+                        self._wake_next()
+                        return
+                    entry[3] = loop.create_future()
+                    # an exhausted budget frees up at the reset, no response will wake the queue
+                    delay = max(0.0, self.reset_at - time.monotonic()) + 0.05 if self.reset_at else None
+                try:
+                    await asyncio.wait_for(entry[3], delay)
+                except TimeoutError:
+                    pass
+        except BaseException:
+            with self._lock:
+                if entry in self._queue:
+                    self._queue.remove(entry)
+                    heapq.heapify(self._queue)
+                self._wake_next()
+            raise
+
+    def update(self, headers: Mapping[str, str]):
+        """Update the budget from the rate limit headers of a response."""
+        try:
+            remaining = int(headers["X-Ratelimit-Remaining"])
+            reset = float(headers["X-Ratelimit-Reset"])
+        except (KeyError, ValueError):
+            return
+        with self._lock:
+            self.remaining = remaining
+            self.reset_at = time.monotonic() + reset
+            self._wake_next()
+
+    def limited(self, headers: Mapping[str, str]) -> float:
+        """
+        Note a 429 response, no requests are started until the budget resets.
+
+        Returns:
+            float: Seconds until the reset, from `Retry-After` or `X-Ratelimit-Reset`.
+        """
+        delay = 1.0
+        for name in ("Retry-After", "X-Ratelimit-Reset"):
+            try:
+                delay = float(headers[name])
+                break
+            except (KeyError, ValueError):
+                continue
+        with self._lock:
+            self.remaining = 0
+            self.reset_at = max(self.reset_at, time.monotonic() + delay)
+        return delay
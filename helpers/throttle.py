@@ -0,0 +1,60 @@
+import asyncio, threading, time
+
+from config import DOWNLOAD_BANDWIDTH_LIMIT, DISK_WRITE_LIMIT
+
+class TokenBucket:
+    """
+    Token bucket rate limiter, e.g. for bytes per second.
+
+    The state is guarded by a thread lock instead of asyncio primitives, so one bucket can be
+    shared by downloads running on different event loops (Textual thread workers).
+    A `rate` of 0 disables the limit.
+    """
+    def __init__(self, rate: float = 0, burst: float | None = None):
+        self._lock = threading.Lock()
+        self.set_rate(rate, burst)
+
+    def set_rate(self, rate: float, burst: float | None = None):
+        """Change the rate, `burst` defaults to one second worth of tokens."""
+        with self._lock:
+            self.rate = max(0.0, rate)
+            self.burst = burst if burst is not None else self.rate
+            self._tokens = self.burst
+            self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0
+
+    def reserve(self, amount: float) -> float:
+        """Take `amount` tokens, going into debt if needed. Returns the seconds to wait before using them."""
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return -self._tokens / self.rate if self._tokens < 0 else 0.0
+
+    async def consume(self, amount: float):
+        """Wait until `amount` tokens are available."""
+        delay = self.reserve(amount)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    def consume_blocking(self, amount: float):
+        """Like `consume`, for code running in a worker thread."""
+        delay = self.reserve(amount)
+        if delay > 0:
+            time.sleep(delay)
+
+async def throttle(buckets, amount: float):
+    """Wait for `amount` tokens from every bucket, the slowest one decides."""
+    delay = max((bucket.reserve(amount) for bucket in buckets if bucket is not None), default=0.0)
+    if delay > 0:
+        await asyncio.sleep(delay)
+
+# shared by every download and copy in the process
+bandwidth_limiter = TokenBucket(DOWNLOAD_BANDWIDTH_LIMIT)
+disk_write_limiter = TokenBucket(DISK_WRITE_LIMIT)
@@ -1,5 +1,4 @@
-import unicodedata, re, httpx, aiofiles
-from pathlib import Path
+import unicodedata, re
 from datetime import datetime
 from typing import Literal
 
@@ -28,22 +27,6 @@ def sanitize_filename(text: str) -> str:
 
     return text.lower()
 
-async def download_file(url: str, dest: Path, progress_cb=None, step=None, cancel_event=None):
-    async with httpx.AsyncClient() as client:
-        async with client.stream("GET", url) as resp:
-            resp.raise_for_status()
-            total = int(resp.headers.get("Content-Length", 0))
-            dest.parent.mkdir(parents=True, exist_ok=True)
-            downloaded = 0
-            async with aiofiles.open(dest, "wb") as f:
-                async for chunk in resp.aiter_bytes(16384):
-                    if cancel_event and cancel_event.is_set():
-                        return
-                    await f.write(chunk)
-                    downloaded += len(chunk)
-                    if progress_cb:
-                        progress_cb(total, downloaded, step=step)
-
 def strip_images(text: str) -> str:
     # remove HTML <img ...> tags
     text = re.sub(r'<img[^>]*>', '[image removed]', text)
@@ -1,6 +1,7 @@
 from textual.app import App
 from textual.theme import Theme
 from screens import MainMenu
+from helpers import close_http_client
 
 deepslate_theme = Theme(
     name='deepslate',
@@ -29,6 +30,10 @@ class MineShell(App):
         self.theme = 'deepslate'
         self.push_screen(MainMenu())
 
+    async def on_unmount(self) -> None:
+        # close pooled connections of the shared HTTP client
+        await close_http_client()
+
 if __name__ == '__main__':
     MineShell().run()
 
@@ -8,7 +8,7 @@ from textual.screen import Screen
 from textual.widgets import Header, Footer, Label, TabbedContent, TabPane, Static
 from rich.markdown import Markdown
 
-from backend.api import SourceAPI, ModrinthAPI, CurseforgeAPI
+from backend.api import SourceAPI, ModrinthAPI, CurseforgeAPI, RateLimitError
 from backend.api.mojang import get_minecraft_versions
 from backend.storage import InstanceConfig
 
@@ -83,18 +83,26 @@ class ModDetailScreen(NavigationMixin, DebounceMixin, Screen):
         self.get_mod_info()
         self.get_mod_versions()
 
-    @work(thread=True)
+    @work
     async def get_mod_info(self):
         # mod_info: published, updated
-        self.mod_info = await self.source_api.get_mod(str(self.mod.get('project_id')))
+        try:
+            self.mod_info = await self.source_api.get_mod(str(self.mod.get('project_id')))
+        except RateLimitError as e:
+            self.notify(str(e), severity='error', timeout=5)
+            return
 
         body = strip_images(self.mod_info.get('body', ''))
         self.call_later(self.update_markdown_label, self.description_label, body)
 
-    @work(thread=True)
+    @work
     async def get_mod_versions(self):
         # - mod_versions: id, version_number, files[url, filename, primary], dependencies[version_id | None, project_id, dependency_type]
-        mod_versions = await self.source_api.get_mod_versions(str(self.mod.get('project_id')), modloader=[loader for loader in get_args(ModloaderType)] + ['datapack'])
+        try:
+            mod_versions = await self.source_api.get_mod_versions(str(self.mod.get('project_id')), modloader=[loader for loader in get_args(ModloaderType)] + ['datapack'])
+        except RateLimitError as e:
+            self.notify(str(e), severity='error', timeout=5)
+            return
         if not mod_versions:
             self.notify('Could not load versions.', severity='error', timeout=5)
             return
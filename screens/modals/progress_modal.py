@@ -1,6 +1,4 @@
 import asyncio
-from pathlib import Path
-from aioshutil import rmtree
 
 from textual import work
 from textual.app import ComposeResult
@@ -10,10 +8,11 @@ from textual.widgets import Label, Static, Button, ProgressBar
 
 from backend.api.mojang import get_minecraft_versions
 from backend.storage import InstanceConfig, InstanceRegistry
-from backend.installer.installer import install_modpack, install_modloader
+from backend.installer.installer import install_modpack, install_modloader, resolve_modlist_metadata
 
 from screens.modals import DeleteModal
-from helpers import CustomModal
+from helpers import CustomModal, close_http_client, ProgressBus, StepStarted, StepFinished, BytesProgress, ItemProgress, Status, StepWeights
+from config import PROGRESS_FPS, INSTALL_BANDWIDTH_LIMIT, INSTALL_DISK_WRITE_LIMIT
 
 class ProgressModal(CustomModal):
     CSS_PATH = 'styles/progress_modal.tcss'
@@ -22,14 +21,14 @@ class ProgressModal(CustomModal):
             Binding('escape', 'cancel', show=False),
         ]
 
-    def __init__(self, instance: InstanceConfig, dependencies: list[dict] | None = None, modlist: list[dict] | None = None, mode: str = 'modpack', mc_version_url: str | None = None) -> None:
+    def __init__(self, instance: InstanceConfig, dependencies: list[dict] | None = None, modlist: list[dict] | None = None, mode: str = 'modpack', mc_version_url: str | None = None, modpack_file: dict | None = None, bandwidth_limit: float = INSTALL_BANDWIDTH_LIMIT, disk_write_limit: float = INSTALL_DISK_WRITE_LIMIT) -> None:
         super().__init__()
         self.instance = instance
         self.steps = [
             '1. Downloading Modpack',
-            '2. Extracting Modpack',
+            '2. Reading Modpack',
             f'3. Installing {instance.formatted_modloader()} Modloader',
-            '4. Copying Overrides',
+            '4. Extracting Overrides',
             '5. Getting Modlist',
             '6. Downloading Mods',
             '7. Finalizing Installation'
@@ -43,7 +42,14 @@ class ProgressModal(CustomModal):
         self.modlist = modlist
         self.mode = mode
         self.mc_version_url = mc_version_url
+        self.modpack_file = modpack_file
+        # bytes per second for this install, 0 = unlimited
+        self.bandwidth_limit = bandwidth_limit
+        self.disk_write_limit = disk_write_limit
         self.failed = False
+        # share of the main progress bar per step, index 0 is unused, replaced by byte based weights once the install is planned
+        self.step_weights = [0, 22, 11, 11, 11, 6, 33, 6] if mode == 'modpack' else [0, 33, 33, 34]
+        self.progress = ProgressBus()
 
     def compose(self) -> ComposeResult:
         self.progress_step = Label(id="progress-step", classes='progress label')
@@ -66,13 +72,16 @@ class ProgressModal(CustomModal):
 
     def on_mount(self) -> None:
         self.cancel_event = asyncio.Event()
+        # the install worker only emits events, widgets are updated here on the app loop
+        self.set_interval(1 / PROGRESS_FPS, self.flush_progress)
         self.start_install()
 
     def on_button_pressed(self, event: Button.Pressed) -> None:
         match event.button.id:
             case "cancel-install":
                 if self.failed:
-                    self.dismiss('cancelled')
+                    self.app.push_screen(DeleteModal(f"Delete unfinished Instance '{self.instance.instance_id}'?"), self.close_failed)
+                    return
                 self.cancel_event.set()
                 self.query_one('#cancel-install').disabled = True
                 self.progress_step.update('Cancelling installation...')
@@ -96,9 +105,9 @@ class ProgressModal(CustomModal):
                 ]
                 if self.instance.modloader in ['forge', 'neoforge']:
                     self.mc_version_url = [version["url"] for version in await get_minecraft_versions() if version["id"] == self.instance.minecraft_version][0]
-                status, message = await install_modpack(self.instance, self.steps, dependencies, self.progress_bar_callback, self.step_callback, self.cancel_event, self.modlist, self.mc_version_url)
+                status, message = await install_modpack(self.instance, self.steps, dependencies, self.progress, self.cancel_event, self.modlist, self.mc_version_url, self.modpack_file, self.bandwidth_limit, self.disk_write_limit)
             elif self.mode == 'modloader':
-                status, message = await install_modloader(self.instance, self.modloader_steps, self.progress_bar_callback, self.step_callback, self.cancel_event, self.mc_version_url)
+                status, message = await install_modloader(self.instance, self.modloader_steps, self.progress, self.cancel_event, self.mc_version_url)
             else:
                 return
 
@@ -106,15 +115,15 @@ class ProgressModal(CustomModal):
                 self.notify(f'Instance {self.instance.name} succesfully created!', severity='information', timeout=5)
                 self.update_instances()
                 self.set_finished()
+                if self.mode == 'modpack':
+                    self.app.call_from_thread(self.resolve_metadata)
                 return
             elif status == -1:
                 self.notify('Installation cancelled', severity='information', timeout=5)
                 self.app.call_from_thread(self.dismiss, 'cancelled')
 
+            # the instance folder is kept with its install journal, retrying resumes where it failed
             self.notify(f'Installation failed on step {status}: {message}', severity='error', timeout=5)
-            instance_path = Path('instances') / self.instance.instance_id
-            if instance_path.exists():
-                await rmtree(instance_path, ignore_errors=True)
             self.query_one('#retry-install').disabled = False
             self.query_one('#retry-install').display = 'block'
             self.failed = True
@@ -122,6 +131,29 @@ class ProgressModal(CustomModal):
         except Exception as e:
             self.notify(f'Installation failed: {e}', severity='error', timeout=5)
             self.app.call_from_thread(self.dismiss, 'cancelled')
+        finally:
+            # thread workers run their own event loop, close its pooled connections
+            await close_http_client()
+
+    def close_failed(self, delete: bool | None) -> None:
+        """Close after a failed install, the unfinished instance is deleted or kept to resume."""
+        if delete is None:
+            # the question was closed without an answer, stay on the failed install
+            return
+        if delete:
+            # the caller removes the folder of a cancelled install
+            self.dismiss('cancelled')
+            return
+        self.notify(
+            f"Unfinished instance kept in '{self.instance.path}'. Install it again with the same name to resume, "
+            "or with other settings to replace it.",
+            severity='information', timeout=10
+        )
+        self.dismiss('failed')
+
+    def resolve_metadata(self):
+        """Look up the mod metadata the modpack index doesn't have, on the app so it outlives this modal."""
+        self.app.run_worker(resolve_modlist_metadata(self.instance.path), group='resolve-metadata', exit_on_error=False)
 
     def set_finished(self):
         self.query_one('#progress-finish-container').display = 'block'
@@ -161,19 +193,32 @@ class ProgressModal(CustomModal):
             self.app.push_screen(DeleteModal(f"Overwrite Entry for Instance ID '{self.instance.instance_id}'?"), overwrite_instance)
         return
 
-    # - needs to be refactored alongside install process
+    def flush_progress(self):
+        """Apply the progress events the install process emitted since the last frame."""
+        for event in self.progress.drain():
+            match event:
+                case StepStarted(step=step, label=label):
+                    self.step_callback(label, 0)
+                    self.progress_bar_callback(total=100, progress=0, step=step)
+                case StepFinished(step=step):
+                    self.progress_bar_callback(total=100, progress=100, step=step)
+                case BytesProgress(total=total, done=done, step=step) | ItemProgress(total=total, done=done, step=step):
+                    self.progress_bar_callback(total=total, progress=done, step=step)
+                case Status(text=text):
+                    self.step_callback(text)
+                case StepWeights(weights=weights):
+                    self.step_weights = list(weights)
+
     def progress_bar_callback(self, total: int, progress: int, bar_id: int=1, step: int=0):
-        """Callback to update progress bar from install process."""
+        """Update a progress bar, sub progress of a step also moves the main bar."""
         bar_map = [self.progress_bar, self.sub_progress_bar]
-        step_list = [0, 22, 11, 11, 11, 6, 33, 6]
         bar_map[bar_id].update(total=total, progress=progress)
-        if bar_id == 1 and step and self.sub_progress_bar.progress and self.sub_progress_bar.total:
-            sub_progress_percent = int(self.sub_progress_bar.progress) // int(self.sub_progress_bar.total)
-            self.progress_bar.update(progress=sum(step_list[:step]) + step_list[step] * sub_progress_percent)
+        if bar_id == 1 and step and total and step < len(self.step_weights):
+            sub_progress = min(progress / total, 1)
+            self.progress_bar.update(total=100, progress=sum(self.step_weights[:step]) + self.step_weights[step] * sub_progress)
 
-    # - might also need a refactor
     def step_callback(self, step: str, label_id: int=1):
-        """Callback to update step label from install process."""
+        """Update the step (0) or substep (1) label."""
         label_map = [self.progress_step, self.progress_substep]
         label = label_map[label_id]
         label.update(step)
@@ -8,7 +8,7 @@ from textual.containers import  VerticalGroup, HorizontalGroup
 from textual.screen import Screen
 from textual.widgets import Header, Footer, Static, Button
 
-from backend.api import get_minecraft_versions, SourceAPI, ModrinthAPI, CurseforgeAPI
+from backend.api import get_minecraft_versions, SourceAPI, ModrinthAPI, CurseforgeAPI, RateLimitError
 from backend.storage import InstanceConfig
 
 from screens import ModDetailScreen
@@ -86,7 +86,7 @@ class ModBrowserScreen(NavigationMixin, DebounceMixin, Screen):
 
         self.get_filter_options()
 
-    @work(thread=True)
+    @work
     async def get_filter_options(self):
         """Get options for the filter sidebar and populate it."""
         modloaders = [loader for loader in get_args(ModloaderType)]
@@ -95,7 +95,15 @@ class ModBrowserScreen(NavigationMixin, DebounceMixin, Screen):
         types = ['mod', 'datapack']
         self.call_later(self.filter_sidebar.add_options, 'type', types)
 
-        mc_versions, categories = await asyncio.gather(get_minecraft_versions(), self.source_api.get_categories())
+        async def get_categories() -> list[str]:
+            try:
+                return await self.source_api.get_categories()
+            except RateLimitError as e:
+                # the rest of the filters still work
+                self.notify(f"Couldn't load categories. {e}", severity='error', timeout=5)
+                return []
+
+        mc_versions, categories = await asyncio.gather(get_minecraft_versions(), get_categories())
         
         version_ids: list[str] = [v['id'] for v in mc_versions]
         if version_ids:
@@ -137,13 +145,18 @@ class ModBrowserScreen(NavigationMixin, DebounceMixin, Screen):
             self.filters[event.filter] = list(event.selected)
             self.debounce('search', 0.5, self.search_mods, self.filters)
 
-    @work(thread=True)
+    @work(exclusive=True, group='search')
     async def search_mods(self):
         """Search mods on the selected source."""
         self.call_later(lambda: setattr(self.modlist, 'custom_loading', True))
         query = self.input.value
 
-        data = await self.source_api.search_mods(query, filters=self.filters)
+        try:
+            data = await self.source_api.search_mods(query, filters=self.filters)
+        except RateLimitError as e:
+            self.call_later(lambda: setattr(self.modlist, 'custom_loading', False))
+            self.notify(str(e), severity='error', timeout=5)
+            return
         if data:
             self.call_later(self.modlist.set_mods, data)
         else:
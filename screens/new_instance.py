@@ -12,10 +12,10 @@ from textual.widgets import Button, Footer, Header, Static, Input, Select
 
 from screens.modals import SelectorModal, TextDisplayModal, ProgressModal
 
-from backend.api import SourceAPI, ModrinthAPI, CurseforgeAPI, FTBAPI
+from backend.api import SourceAPI, ModrinthAPI, CurseforgeAPI, FTBAPI, RateLimitError, IncompleteResultError
 from backend.api import get_minecraft_versions, get_fabric_versions, get_forge_versions, get_neoforge_versions, get_quilt_versions
 
-from backend.storage import InstanceConfig
+from backend.storage import InstanceConfig, InstallJournal
 from helpers import format_date, sanitize_filename, ModloaderType, CustomSelect, CustomInput, NavigationMixin
 
 class NewInstanceScreen(NavigationMixin, Screen):
@@ -203,7 +203,11 @@ class NewInstanceScreen(NavigationMixin, Screen):
                     self.description.update(str(selected_pack["description"]))
                     self.author.update(str(selected_pack["author"]))
                     # get modpack versions
-                    self.versions = await self.source_api.get_modpack_versions(str(selected_pack["slug"]))
+                    try:
+                        self.versions = await self.source_api.get_modpack_versions(str(selected_pack["slug"]))
+                    except RateLimitError as e:
+                        self.notify(str(e), severity='error', timeout=5)
+                        return
                     if not self.versions:
                         self.notify(f"Couldn't get Modpack versions for {self.modpack_name}.", severity='error', timeout=5)
                     else:
@@ -278,7 +282,7 @@ class NewInstanceScreen(NavigationMixin, Screen):
                 self.query_one('#install').loading = False
                 if result == 'finished':
                     self.dismiss(sanitize_filename(self.instance_name.value))
-                else:
+                elif result != 'failed':
                     if instance.path.exists():
                         rmtree(instance.path)
 
@@ -293,10 +297,6 @@ class NewInstanceScreen(NavigationMixin, Screen):
             self.query_one('#install').loading = False
             return
         
-        # Clean up unfinished installation
-        if instance_path.exists():
-            rmtree(instance_path, ignore_errors=True)
-
         # Modpack install logic
         if self.install_mode == 'modpack':
             if not self.versions or not self.selected_modpack_version or not self.instance_name.value:
@@ -305,7 +305,8 @@ class NewInstanceScreen(NavigationMixin, Screen):
                 return
             version = self.selected_modpack_version
             
-            modpack_url = next((file["url"] for file in version["files"] if file.get("primary")), None)
+            modpack_file = next((file for file in version["files"] if file.get("primary")), {})
+            modpack_url = modpack_file.get("url")
 
             if version["loaders"][0] not in ("fabric", "forge", "neoforge", "quilt"):
                 self.notify(f"Unsupported Modloader: {version["loaders"][0]}.", severity='error', timeout=5)
@@ -326,8 +327,9 @@ class NewInstanceScreen(NavigationMixin, Screen):
                 modpack_source=self.source,
                 path=instance_path,
             )
+            self.clean_unfinished_install(instance, 'modpack')
 
-            self.app.push_screen(ProgressModal(instance, version["dependencies"], self.modlist, mode='modpack'), install_finished)
+            self.app.push_screen(ProgressModal(instance, version["dependencies"], self.modlist, mode='modpack', modpack_file=modpack_file), install_finished)
 
         # Modloader only install logic
         elif self.install_mode == 'modloader':
@@ -345,6 +347,7 @@ class NewInstanceScreen(NavigationMixin, Screen):
                 modloader_version=self.selected_modloader_version,
                 path=instance_path,
             )
+            self.clean_unfinished_install(instance, 'modloader')
 
             self.app.push_screen(ProgressModal(instance, mode='modloader', mc_version_url=self.selected_minecraft_version["url"]), install_finished)
 
@@ -352,6 +355,16 @@ class NewInstanceScreen(NavigationMixin, Screen):
             self.notify(f"Unknown installation mode '{self.install_mode}'", severity='error', timeout=5)
             self.query_one('#install').loading = False
 
+    def clean_unfinished_install(self, instance: InstanceConfig, mode: str):
+        """Remove what an unfinished installation left behind, unless it was the same install, which then resumes."""
+        if not instance.path.exists():
+            return
+        journal = InstallJournal.load(instance.path)
+        if journal and journal.matches(instance, mode):
+            self.notify(f"Resuming unfinished installation of '{instance.instance_id}'.", severity='information', timeout=5)
+            return
+        rmtree(instance.path, ignore_errors=True)
+
     def search_modpack(self):
         """Runs modpack selection from sync context."""
         self.query_one('#search_button').loading = True
@@ -497,7 +510,12 @@ class NewInstanceScreen(NavigationMixin, Screen):
         if self.modlist:
             modlist = self.modlist
         else:
-            modlist = await self.source_api.get_modlist(self.selected_modpack_version["dependencies"])
+            try:
+                modlist = await self.source_api.get_modlist(self.selected_modpack_version["dependencies"])
+            except (RateLimitError, IncompleteResultError) as e:
+                self.notify(str(e), severity='error', timeout=5)
+                self.query_one('#modlist_button').loading = False
+                return
         if modlist:
             self.modlist = modlist
             formatted_modlist = "\n".join(f"- {mod['name']} ({mod['version_number']})" for mod in sorted(modlist, key=lambda m: m['name'].lower()))